@@ -1,34 +1,27 @@
-import os
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.prebuilt import create_react_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from .config import GOOGLE_API_KEY, MCP_SERVERS, MODEL_NAME
-from .auth import save_credentials
+from .history import HistoryManager
+from .pool import AgentPool
 from .system_prompt import create_system_message
 
 
 class ORBITAgent:
-    def __init__(self):
-        self.agent = None
+    def __init__(self, pool=None):
+        # Sessions share the pool's compiled graph and only own their messages
+        self.pool = pool or AgentPool(refresh_interval=None)
         self.current_tasklist_id = None
         self.messages = []
-        
-    async def initialize(self):
-        os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
-
-        save_credentials()
+        self.history = None
+        self.last_usage = {}
 
-        client = MultiServerMCPClient(MCP_SERVERS)
+    @property
+    def agent(self):
+        return self.pool.agent
 
-        tools = await client.get_tools()
-
-        model = ChatGoogleGenerativeAI(model=MODEL_NAME)
+    async def initialize(self):
+        await self.pool.warm()
+        self.history = HistoryManager(self.pool.model)
 
         system_message = create_system_message(self.current_tasklist_id)
 
-        self.agent = create_react_agent(model, tools)
-
         self.messages = [system_message]
 
     async def chat(self, user_input):
@@ -40,7 +33,9 @@ class ORBITAgent:
         try:
             response = await self.agent.ainvoke({"messages": self.messages})
             reply = response['messages'][-1].content
+            self.last_usage = self.history.usage(self.messages, response['messages'])
             self.messages.append({"role": "assistant", "content": reply})
+            self.messages = await self.history.compact(self.messages)
             return reply
         except Exception as e:
             raise Exception(f"Agent processing failed: {str(e)}")
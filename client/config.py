@@ -40,4 +40,63 @@ MCP_SERVERS = {
     }
 }
 
-MODEL_NAME = "gemini-2.5-pro"
\ No newline at end of file
+MODEL_NAME = "gemini-2.5-pro"
+
+# Seconds between background checks for changed MCP tool lists
+TOOL_REFRESH_INTERVAL = 300
+# Forward LLM token deltas to WebSocket clients as agent_token events
+STREAM_TOKENS = True
+# User messages a WebSocket client may queue behind the running turn before new ones are refused
+WS_INBOUND_QUEUE_SIZE = 8
+# Seconds one outbound frame may wait on a client that stopped reading before the connection is dropped
+WS_SEND_TIMEOUT = 10.0
+# Frames a client may fall behind (personal events and broadcasts) before it is disconnected as lagging
+WS_SEND_BUFFER_SIZE = 256
+# Events emitted within this many seconds share one WebSocket frame (0 sends each event on its own)
+WS_COALESCE_WINDOW = 0.02
+WS_COALESCE_MAX_EVENTS = 64
+# uvicorn worker processes for the WebSocket server; more than one needs a shared session store
+WS_WORKERS = int(os.getenv("ORBIT_WS_WORKERS", "1"))
+
+# Push inbox_update events to connected clients when WhatsApp or Gmail receive messages
+INBOX_WATCHERS = True
+WHATSAPP_DB_PATH = './server/whatsapp/whatsapp-bridge/store/messages.db'
+WHATSAPP_WATCH_INTERVAL = 2.0
+GMAIL_WATCH_INTERVAL = 30.0
+# Newest messages described in one inbox_update; its count covers the rest
+INBOX_UPDATE_MAX_ITEMS = 10
+
+# Where conversations live between connections: "sqlite" (shared by workers, kept across restarts) or "memory"
+SESSION_STORE = os.getenv("ORBIT_SESSION_STORE", "sqlite")
+SESSION_DB_PATH = './data/sessions.db'
+# Seconds an idle conversation can still be resumed
+SESSION_TTL = 7 * 24 * 3600
+
+# Approximate prompt budget (system prompt included) before older turns are summarized
+HISTORY_TOKEN_BUDGET = 32000
+# Most recent user turns always kept verbatim
+HISTORY_KEEP_TURNS = 4
+# Tool outputs the model already answered to are cut to this many tokens
+TOOL_OUTPUT_TOKEN_LIMIT = 2000
+
+# Concurrent tool calls allowed per MCP server when the model requests several at once
+SERVER_CONCURRENCY = {
+    "whatsapp": 2,
+}
+DEFAULT_SERVER_CONCURRENCY = 4
+
+# Seconds a read-only tool's result may be reused; tools not listed are never cached
+TOOL_CACHE_TTLS = {
+    "list_tasklists": 300,
+    "get_tasklist": 300,
+    "list_tasks": 60,
+    "get_task": 60,
+    "get_last_emails": 30,
+    "search_emails": 60,
+    "list_chats": 30,
+    "get_chat": 60,
+    "search_contacts": 300,
+}
+# A successful call to a tool with one of these prefixes clears its server's cached results
+MUTATING_TOOL_PREFIXES = ("create_", "update_", "delete_", "send_", "forward_", "smart_")
+TOOL_CACHE_MAX_ENTRIES = 512
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    # Optional; without it clients can only negotiate JSON
+    msgpack = None
+
+from .config import WS_COALESCE_WINDOW, WS_COALESCE_MAX_EVENTS
+
+logger = logging.getLogger(__name__)
+
+JSON_SUBPROTOCOL = "orbit.json"
+MSGPACK_SUBPROTOCOL = "orbit.msgpack"
+
+
+class EventCodec:
+    """Wire encoding of one WebSocket connection, negotiated as a subprotocol at connect.
+
+    JSON (encoded with orjson) is sent as text frames and is the default
+    when the client offers no subprotocol. MessagePack is sent as binary
+    frames and only offered when the msgpack package is installed.
+    """
+
+    def __init__(self, subprotocol=None):
+        self.subprotocol = subprotocol
+        self.binary = subprotocol == MSGPACK_SUBPROTOCOL
+
+    @classmethod
+    def supported(cls):
+        return [JSON_SUBPROTOCOL] + ([MSGPACK_SUBPROTOCOL] if msgpack else [])
+
+    @classmethod
+    def negotiate(cls, offered):
+        """Pick the first subprotocol the client offered that we support."""
+        supported = cls.supported()
+        for subprotocol in offered or []:
+            if subprotocol in supported:
+                return cls(subprotocol)
+        return cls()
+
+    def encode(self, payload):
+        if self.binary:
+            return msgpack.packb(payload, default=str)
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def decode(self, data):
+        """Parse one inbound frame; raises ValueError on malformed input."""
+        if isinstance(data, bytes) and self.binary:
+            try:
+                return msgpack.unpackb(data)
+            except Exception as e:
+                raise ValueError(f"Invalid MessagePack frame: {e}") from e
+        return orjson.loads(data)
+
+
+class EventCoalescer:
+    """Batches the events of one connection into fewer frames.
+
+    Events emitted within ``window`` seconds of the first buffered one go
+    out together as a JSON/MessagePack array (a single event is still sent
+    on its own), so e.g. ``tool_called`` and ``tool_executing`` share a frame.
+    Consecutive ``agent_token`` deltas of one execution merge into a single
+    event. Reaching ``max_events`` flushes immediately.
+    """
+
+    def __init__(self, send, window=WS_COALESCE_WINDOW, max_events=WS_COALESCE_MAX_EVENTS):
+        self.send = send
+        self.window = window
+        self.max_events = max_events
+        self._pending = []
+        self._flush_task = None
+
+    def _merge(self, event):
+        last = self._pending[-1] if self._pending else None
+        if (
+            last is not None
+            and event["type"] == "agent_token" == last["type"]
+            and event.get("execution_id") == last.get("execution_id")
+        ):
+            last["data"] = {**last["data"], "delta": last["data"].get("delta", "") + event["data"].get("delta", "")}
+            return True
+        return False
+
+    async def put(self, event):
+        if self.window <= 0:
+            await self.send(event)
+            return
+
+        if not self._merge(event):
+            self._pending.append(event)
+
+        if len(self._pending) >= self.max_events:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        # Cleared before sending so flush() never cancels a send in progress
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        events, self._pending = self._pending, []
+        if events:
+            await self.send(events[0] if len(events) == 1 else events)
+
+    def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending = []
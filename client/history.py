@@ -0,0 +1,168 @@
+import logging
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import convert_to_messages, count_tokens_approximately
+
+from .config import HISTORY_TOKEN_BUDGET, HISTORY_KEEP_TURNS, TOOL_OUTPUT_TOKEN_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# count_tokens_approximately assumes ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+SUMMARY_HEADER = "\n\n## Summary of the earlier conversation\n"
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and their personal assistant.
+Merge the new conversation lines into the current summary. Keep facts, names, IDs, dates, decisions, open tasks
+and user preferences that later turns may rely on; drop pleasantries and tool chatter. Reply with the updated
+summary only, as short bullet points."""
+
+
+def _truncate(text: str, limit: int) -> str:
+    max_chars = limit * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"\n... [truncated {len(text) - max_chars} characters]"
+
+
+def truncate_tool_outputs(messages, limit: int = TOOL_OUTPUT_TOKEN_LIMIT):
+    """Shorten tool outputs the model has already answered to.
+
+    A tool message followed by a later AI message was consumed on an earlier
+    step of the same turn, so only its head is resent on the following
+    model calls. The newest tool outputs are always passed through whole.
+    """
+    last_ai = max((i for i, message in enumerate(messages) if isinstance(message, AIMessage)), default=-1)
+
+    trimmed = []
+    for i, message in enumerate(messages):
+        if i < last_ai and isinstance(message, ToolMessage) and isinstance(message.content, str):
+            content = _truncate(message.content, limit)
+            if content is not message.content:
+                message = message.model_copy(update={"content": content})
+        trimmed.append(message)
+    return trimmed
+
+
+def tool_output_hook(state):
+    """``pre_model_hook`` for the ReAct graph; the graph state itself is left untouched."""
+    return {"llm_input_messages": truncate_tool_outputs(state["messages"])}
+
+
+def _split_turns(messages):
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _text(message) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return content
+
+
+class HistoryManager:
+    """Keeps a session's message list within a token budget.
+
+    The system message and the last ``keep_turns`` turns are kept verbatim.
+    Once the history exceeds ``budget`` tokens the oldest turns are folded
+    into a running summary, written by the model and appended to the system
+    message, so each compaction only summarizes the turns it drops.
+    """
+
+    def __init__(self, model=None, budget: int = HISTORY_TOKEN_BUDGET, keep_turns: int = HISTORY_KEEP_TURNS):
+        self.model = model
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self.summary = ""
+        self._system = None
+        self._summary_system = None
+
+    def restore(self, system: SystemMessage, summary: str) -> SystemMessage:
+        """Resume from a saved ``summary`` on top of the base ``system`` message.
+
+        Returns the system message to start the history with; later
+        compactions merge into this summary instead of appending another one.
+        """
+        self._system = system
+        self.summary = summary
+        self._summary_system = None
+        if not summary:
+            return system
+        self._summary_system = SystemMessage(content=system.content + SUMMARY_HEADER + summary)
+        return self._summary_system
+
+    @staticmethod
+    def count(messages) -> int:
+        return count_tokens_approximately(messages)
+
+    def usage(self, prompt, response_messages) -> dict:
+        """Token counts for one turn.
+
+        ``history_tokens`` is the local estimate of the prompt that was sent;
+        the other counts are what the model reported for every call it made
+        during the turn (one per ReAct step). Stored history messages carry no
+        usage metadata, so passing the whole response state is fine.
+        """
+        usage = {"history_tokens": self.count(prompt), "input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        for message in response_messages:
+            metadata = getattr(message, "usage_metadata", None)
+            if metadata:
+                for key in ("input_tokens", "output_tokens", "total_tokens"):
+                    usage[key] += metadata.get(key, 0)
+        return usage
+
+    async def compact(self, messages):
+        """Return ``messages`` folded down to the budget (unchanged if already within it)."""
+        if self.count(messages) <= self.budget:
+            return messages
+
+        messages = convert_to_messages(messages)
+        system, rest = None, messages
+        if messages and isinstance(messages[0], SystemMessage):
+            system, rest = messages[0], messages[1:]
+            if system is not self._summary_system:
+                self._system = system
+
+        turns = _split_turns(rest)
+        dropped = []
+        while len(turns) > self.keep_turns and self.count(([system] if system else []) + [m for t in turns for m in t]) > self.budget:
+            dropped.extend(turns.pop(0))
+
+        if not dropped:
+            return messages
+
+        await self._summarize(dropped)
+        compacted = [m for turn in turns for m in turn]
+        if self._system is not None:
+            self._summary_system = SystemMessage(content=self._system.content + SUMMARY_HEADER + self.summary)
+            compacted.insert(0, self._summary_system)
+
+        logger.info(f"Compacted {len(dropped)} messages into the summary, history is now ~{self.count(compacted)} tokens")
+        return compacted
+
+    async def _summarize(self, messages) -> None:
+        lines = []
+        for message in messages:
+            role = "User" if isinstance(message, HumanMessage) else "Assistant"
+            lines.append(f"{role}: {_truncate(_text(message), TOOL_OUTPUT_TOKEN_LIMIT)}")
+        transcript = "\n".join(lines)
+
+        if self.model is None:
+            # No model to summarize with: keep a clipped transcript instead
+            self.summary = _truncate(f"{self.summary}\n{transcript}".strip(), TOOL_OUTPUT_TOKEN_LIMIT)
+            return
+
+        try:
+            response = await self.model.ainvoke([
+                SystemMessage(content=SUMMARY_PROMPT),
+                HumanMessage(content=f"Current summary:\n{self.summary or '(empty)'}\n\nNew conversation lines:\n{transcript}")
+            ])
+            self.summary = _text(response).strip()
+        except Exception as e:
+            # The turns are dropped either way; the budget matters more than a perfect summary
+            logger.warning(f"History summarization failed, dropping {len(messages)} messages: {str(e)}")
@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langgraph.prebuilt import create_react_agent
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from .config import (
+    GOOGLE_API_KEY,
+    MCP_SERVERS,
+    MODEL_NAME,
+    TOOL_REFRESH_INTERVAL,
+    SERVER_CONCURRENCY,
+    DEFAULT_SERVER_CONCURRENCY
+)
+from .auth import save_credentials
+from .history import tool_output_hook
+from .tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(tools):
+    """Stable hash of a server's tool names, descriptions and input schemas."""
+    schema = []
+    for tool in sorted(tools, key=lambda t: t.name):
+        args = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args
+        schema.append([tool.name, tool.description, args])
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _limit_concurrency(tool, semaphore):
+    """Copy of an MCP tool whose calls wait on ``semaphore``."""
+    coroutine = tool.coroutine
+
+    @functools.wraps(coroutine)
+    async def call(*args, **kwargs):
+        async with semaphore:
+            return await coroutine(*args, **kwargs)
+
+    return tool.model_copy(update={"coroutine": call})
+
+
+class AgentPool:
+    """Process-wide MCP client, tool set and compiled ReAct graph.
+
+    The graph holds no conversation state, so every session shares the same
+    compiled agent and only keeps its own message list (see ``ORBITAgent``).
+
+    The graph's tool node runs all tool calls of one model step concurrently;
+    each server's tools share a semaphore so a slow server only queues its
+    own calls and never holds up the others. Read-only tool results are
+    served from ``tool_cache`` across sessions until they expire or a
+    mutating tool on the same server succeeds.
+    """
+
+    def __init__(self, servers=MCP_SERVERS, refresh_interval=TOOL_REFRESH_INTERVAL):
+        self.servers = servers
+        self.refresh_interval = refresh_interval
+        self.client = None
+        self.model = None
+        self.agent = None
+        self.tools = {}
+        self._fingerprints = {}
+        self._semaphores = {
+            name: asyncio.Semaphore(SERVER_CONCURRENCY.get(name, DEFAULT_SERVER_CONCURRENCY))
+            for name in servers
+        }
+        self.tool_cache = ToolResultCache()
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+
+    async def warm(self):
+        """Load tools from every MCP server and compile the agent once."""
+        if self.agent:
+            return
+
+        async with self._lock:
+            if self.agent:
+                return
+
+            os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
+            await asyncio.to_thread(save_credentials)
+
+            self.client = MultiServerMCPClient(self.servers)
+            self.model = ChatGoogleGenerativeAI(model=MODEL_NAME)
+
+            fetched = await self._fetch_tools()
+            if not fetched:
+                raise RuntimeError("No MCP server returned any tools")
+
+            self._apply(fetched)
+            logger.info(f"Agent pool warmed with {sum(len(t) for t in self.tools.values())} tools from {len(self.tools)} servers")
+
+    async def _fetch_tools(self):
+        """Fetch tool lists from all servers concurrently, skipping unreachable ones."""
+        names = list(self.servers)
+        results = await asyncio.gather(
+            *(self.client.get_tools(server_name=name) for name in names),
+            return_exceptions=True
+        )
+
+        fetched = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to load tools from MCP server '{name}': {str(result)}")
+                continue
+            fetched[name] = result
+        return fetched
+
+    def _apply(self, fetched):
+        for name, tools in fetched.items():
+            if name in self.tools:
+                # Changed tool definitions may change what cached results mean
+                self.tool_cache.invalidate(name)
+            self.tools[name] = [
+                self.tool_cache.wrap(name, _limit_concurrency(tool, self._semaphores[name]))
+                for tool in tools
+            ]
+            self._fingerprints[name] = _fingerprint(tools)
+
+        all_tools = [tool for name in self.servers for tool in self.tools.get(name, [])]
+        self.agent = create_react_agent(self.model, all_tools, pre_model_hook=tool_output_hook)
+
+    async def refresh(self):
+        """Rebuild the graph if any server's tool list changed since the last load.
+
+        Returns the names of the servers whose tools changed.
+        """
+        if not self.client:
+            await self.warm()
+            return list(self.tools)
+
+        fetched = await self._fetch_tools()
+        changed = {
+            name: tools for name, tools in fetched.items()
+            if self._fingerprints.get(name) != _fingerprint(tools)
+        }
+
+        if changed:
+            async with self._lock:
+                self._apply(changed)
+            logger.info(f"Rebuilt agent after tool changes on: {', '.join(changed)}")
+
+        return list(changed)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Background tool refresh failed: {str(e)}")
+
+    def start_background_refresh(self):
+        if self.refresh_interval and not self._refresh_task:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from .config import SESSION_STORE, SESSION_DB_PATH, SESSION_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class SessionStore(ABC):
+    """Conversation state keyed by session ID, kept outside any one connection.
+
+    A reconnecting client passes its session ID and gets its messages back,
+    whichever worker it lands on. The system prompt is not stored: a session
+    is its conversation messages plus the history summary, and the system
+    message is rebuilt from the current prompt and that summary on resume.
+    Sessions unused for ``ttl`` seconds are forgotten. Two connections on the
+    same session are last-writer-wins.
+    """
+
+    # Whether every worker process sees the same sessions
+    shared = False
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def load(self, session_id):
+        """Return the session's ``(messages, summary)``, or None if it is unknown or expired."""
+
+    @abstractmethod
+    def save(self, session_id, messages, summary=""):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store; survives reconnects but not restarts, and needs a single worker."""
+
+    def __init__(self, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        self._sessions = {}
+
+    def _prune(self, now):
+        for session_id in [key for key, (updated_at, _, _) in self._sessions.items() if now - updated_at > self.ttl]:
+            del self._sessions[session_id]
+
+    def load(self, session_id):
+        now = time.time()
+        self._prune(now)
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        # Stored serialized so callers never share message objects between connections
+        _, messages, summary = entry
+        return messages_from_dict(json.loads(messages)), summary
+
+    def save(self, session_id, messages, summary=""):
+        self._sessions[session_id] = (time.time(), json.dumps(messages_to_dict(messages)), summary)
+
+    def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store in a local SQLite file, shared by every worker on the host and kept across restarts."""
+
+    shared = True
+
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            # WAL lets one worker save while others load
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    messages TEXT NOT NULL,
+                    summary TEXT NOT NULL DEFAULT '',
+                    updated_at REAL NOT NULL
+                )
+            """)
+            if "summary" not in [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]:
+                # Created before summaries were stored separately
+                conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+            self._conn = conn
+        return self._conn
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._db().execute("""
+                SELECT messages, summary FROM sessions WHERE session_id = ? AND updated_at > ?
+            """, (session_id, time.time() - self.ttl)).fetchone()
+        return (messages_from_dict(json.loads(row[0])), row[1]) if row else None
+
+    def save(self, session_id, messages, summary=""):
+        payload = json.dumps(messages_to_dict(messages))
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("""
+                    INSERT INTO sessions (session_id, messages, summary, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (session_id) DO UPDATE SET
+                        messages = excluded.messages, summary = excluded.summary, updated_at = excluded.updated_at
+                """, (session_id, payload, summary, now))
+                conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (now - self.ttl,))
+
+    def delete(self, session_id):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_session_store(backend=SESSION_STORE):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session store backend '{backend}'")
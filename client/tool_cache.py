@@ -0,0 +1,115 @@
+import functools
+import json
+import logging
+import time
+
+from .config import TOOL_CACHE_TTLS, MUTATING_TOOL_PREFIXES, TOOL_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+def _succeeded(result) -> bool:
+    """Whether a tool result reports success; our servers signal failure in the payload."""
+    content = result[0] if isinstance(result, tuple) else result
+    if isinstance(content, list):
+        content = "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    try:
+        payload = json.loads(content)
+    except (TypeError, ValueError):
+        return True
+    if isinstance(payload, dict):
+        return payload.get("status") != "error" and payload.get("success") is not False
+    return True
+
+
+class ToolResultCache:
+    """TTL cache for read-only MCP tool results, shared by every session.
+
+    Only tools listed in ``ttls`` are cached, keyed on server, tool name and
+    the call's arguments merged over the schema defaults. A successful call
+    to a mutating tool (name starting with one of ``mutating_prefixes``)
+    drops every cached result of the same server. Each server has a
+    generation counter so a read that overlapped a write is not stored.
+    """
+
+    def __init__(self, ttls=TOOL_CACHE_TTLS, mutating_prefixes=MUTATING_TOOL_PREFIXES, max_entries=TOOL_CACHE_MAX_ENTRIES):
+        self.ttls = ttls
+        self.mutating_prefixes = tuple(mutating_prefixes)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = {}
+        self._generations = {}
+
+    def _key(self, server, tool, kwargs):
+        args = {
+            name: schema["default"]
+            for name, schema in tool.args.items()
+            if isinstance(schema, dict) and "default" in schema
+        }
+        args.update(kwargs)
+        args = {name: value.strip() if isinstance(value, str) else value for name, value in args.items() if value is not None}
+        return (server, tool.name, json.dumps(args, sort_keys=True, default=str))
+
+    def _store(self, key, result, ttl):
+        now = time.monotonic()
+        if len(self._entries) >= self.max_entries:
+            for expired in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[expired]
+            while len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (now + ttl, result)
+
+    def invalidate(self, server=None):
+        """Drop cached results for one server, or for all servers."""
+        for key in [k for k in self._entries if server is None or k[0] == server]:
+            del self._entries[key]
+        for name in ([server] if server else list(self._generations)):
+            self._generations[name] = self._generations.get(name, 0) + 1
+        self.invalidations += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries)
+        }
+
+    def wrap(self, server, tool):
+        """Return a copy of ``tool`` that reads through, or invalidates, this cache."""
+        coroutine = tool.coroutine
+        ttl = self.ttls.get(tool.name)
+        mutating = tool.name.startswith(self.mutating_prefixes)
+        if not ttl and not mutating:
+            return tool
+
+        if mutating:
+            @functools.wraps(coroutine)
+            async def call(*args, **kwargs):
+                result = await coroutine(*args, **kwargs)
+                if _succeeded(result):
+                    logger.debug(f"{tool.name} changed data on '{server}', dropping its cached results")
+                    self.invalidate(server)
+                return result
+        else:
+            @functools.wraps(coroutine)
+            async def call(*args, **kwargs):
+                key = self._key(server, tool, kwargs)
+                cached = self._entries.get(key)
+                if cached and cached[0] > time.monotonic():
+                    self.hits += 1
+                    return cached[1]
+
+                self.misses += 1
+                generation = self._generations.get(server, 0)
+                result = await coroutine(*args, **kwargs)
+                if _succeeded(result) and self._generations.get(server, 0) == generation:
+                    self._store(key, result, ttl)
+                return result
+
+        return tool.model_copy(update={"coroutine": call})
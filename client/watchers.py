@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+from googleapiclient.errors import HttpError
+
+from server.google_service import GoogleServicePool
+from .config import (
+    TOKEN_PATH,
+    WHATSAPP_DB_PATH,
+    WHATSAPP_WATCH_INTERVAL,
+    GMAIL_WATCH_INTERVAL,
+    INBOX_UPDATE_MAX_ITEMS
+)
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CHARS = 120
+
+
+def _preview(text):
+    text = " ".join((text or "").split())
+    return text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+
+
+class WhatsAppWatcher:
+    """Reports messages the bridge added to messages.db since the last poll.
+
+    New rows are found by rowid above a high-water mark taken at startup,
+    a range seek on the table's rowid b-tree. The bridge rewrites existing
+    messages with INSERT OR REPLACE, which also gives them a new rowid, so
+    rows must also be newer than the newest (timestamp, id) already seen.
+    ``PRAGMA data_version`` skips the query entirely while the bridge has
+    not committed anything.
+    """
+
+    source = "whatsapp"
+
+    def __init__(self, path=WHATSAPP_DB_PATH, max_items=INBOX_UPDATE_MAX_ITEMS):
+        self.path = path
+        self.max_items = max_items
+        self._conn = None
+        self._data_version = None
+        self._high_water = None
+        # Newest message timestamp seen, and the IDs seen at exactly that timestamp
+        self._since = None
+        self._since_ids = []
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._high_water = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM messages").fetchone()[0]
+            self._since = conn.execute("SELECT COALESCE(MAX(timestamp), '') FROM messages").fetchone()[0]
+            self._since_ids = [row[0] for row in conn.execute("SELECT id FROM messages WHERE timestamp = ?", (self._since,))]
+            self._conn = conn
+        return self._conn
+
+    def poll(self):
+        """Return an inbox_update payload for new incoming messages, or None."""
+        if not os.path.exists(self.path):
+            return None
+
+        conn = self._db()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return None
+        self._data_version = data_version
+
+        high_water = conn.execute(
+            "SELECT COALESCE(MAX(rowid), ?) FROM messages WHERE rowid > ?", (self._high_water, self._high_water)
+        ).fetchone()[0]
+        if high_water == self._high_water:
+            return None
+
+        # Rows past the high-water mark that are not rewrites of messages seen before
+        new_rows = """
+            m.rowid > ? AND m.rowid <= ?
+            AND (m.timestamp > ? OR (m.timestamp = ? AND m.id NOT IN (SELECT value FROM json_each(?))))
+        """
+        params = (self._high_water, high_water, self._since, self._since, json.dumps(self._since_ids))
+
+        count = conn.execute(f"""
+            SELECT COUNT(*) FROM messages m WHERE {new_rows} AND NOT m.is_from_me
+        """, params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT m.id, m.chat_jid, c.name, m.sender, m.content, m.timestamp, m.media_type
+            FROM messages m
+            LEFT JOIN chats c ON c.jid = m.chat_jid
+            WHERE {new_rows} AND NOT m.is_from_me
+            ORDER BY m.rowid DESC
+            LIMIT ?
+        """, params + (self.max_items,)).fetchall()
+
+        newest = conn.execute(f"SELECT MAX(m.timestamp) FROM messages m WHERE {new_rows}", params).fetchone()[0]
+        if newest is not None:
+            newest_ids = [row[0] for row in conn.execute(f"SELECT m.id FROM messages m WHERE {new_rows} AND m.timestamp = ?", params + (newest,))]
+            self._since_ids = (self._since_ids if newest == self._since else []) + newest_ids
+            self._since = newest
+        self._high_water = high_water
+
+        if not count:
+            return None
+        return {
+            "source": self.source,
+            "count": count,
+            "items": [
+                {
+                    "id": message_id,
+                    "chat_jid": chat_jid,
+                    "chat_name": chat_name or chat_jid,
+                    "sender": sender,
+                    "preview": _preview(content) or (f"[{media_type}]" if media_type else ""),
+                    "timestamp": timestamp
+                }
+                for message_id, chat_jid, chat_name, sender, content, timestamp, media_type in rows
+            ]
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class GmailWatcher:
+    """Reports mail added to the inbox since the last poll via users.history.list.
+
+    Starts from the mailbox's historyId at the first poll and only fetches
+    headers of the few newest added messages.
+    """
+
+    source = "gmail"
+
+    def __init__(self, token_path=TOKEN_PATH, max_items=INBOX_UPDATE_MAX_ITEMS):
+        self.max_items = max_items
+        self.pool = GoogleServicePool(
+            'gmail', 'v1', token_path, max_idle=1,
+            missing_message="Gmail credentials not found; Gmail inbox notifications wait until they exist."
+        )
+        self._history_id = None
+
+    def _added_message_ids(self, service):
+        message_ids = []
+        page_token = None
+        while True:
+            params = {'userId': 'me', 'startHistoryId': self._history_id, 'historyTypes': ['messageAdded'], 'labelId': 'INBOX'}
+            if page_token:
+                params['pageToken'] = page_token
+            response = service.users().history().list(**params).execute()
+
+            for record in response.get('history', []):
+                for item in record.get('messagesAdded', []):
+                    message = item['message']
+                    if 'INBOX' in message.get('labelIds', []) and 'SENT' not in message.get('labelIds', []):
+                        message_ids.append(message['id'])
+
+            latest_history_id = response.get('historyId', self._history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return list(dict.fromkeys(message_ids)), latest_history_id
+
+    def poll(self):
+        """Return an inbox_update payload for new inbox mail, or None."""
+        with self.pool.checkout() as service:
+            if self._history_id is None:
+                self._history_id = service.users().getProfile(userId='me').execute()['historyId']
+                return None
+
+            try:
+                message_ids, latest_history_id = self._added_message_ids(service)
+            except HttpError as e:
+                if e.resp.status == 404:
+                    # historyId too old to resume from; start over from now
+                    self._history_id = None
+                    return None
+                raise
+            self._history_id = latest_history_id
+
+            if not message_ids:
+                return None
+
+            items = []
+            for message_id in message_ids[-self.max_items:][::-1]:
+                try:
+                    message = service.users().messages().get(
+                        userId='me', id=message_id, format='metadata', metadataHeaders=['From', 'Subject']
+                    ).execute()
+                except HttpError:
+                    # Deleted again before we looked
+                    continue
+                headers = {header['name']: header['value'] for header in message.get('payload', {}).get('headers', [])}
+                items.append({
+                    "id": message_id,
+                    "thread_id": message.get('threadId'),
+                    "from": headers.get('From', ''),
+                    "subject": headers.get('Subject', ''),
+                    "preview": _preview(message.get('snippet'))
+                })
+
+        return {"source": self.source, "count": len(message_ids), "items": items}
+
+    def close(self):
+        pass
+
+
+class InboxWatcher:
+    """Background polling of the inboxes, pushed to every client as inbox_update events.
+
+    Each source is polled in a worker thread on its own interval, only while
+    at least one client is connected; changes accumulate in the meantime and
+    are reported on the next poll. New data also drops the source's cached
+    tool results so the agent does not answer from a stale list. A source
+    that fails to set up (no bridge database yet, no Gmail token) is retried
+    on later polls and only logged once.
+    """
+
+    def __init__(self, connection_manager, tool_cache=None, watchers=None):
+        self.connection_manager = connection_manager
+        self.tool_cache = tool_cache
+        self.watchers = watchers if watchers is not None else [
+            (WhatsAppWatcher(), WHATSAPP_WATCH_INTERVAL),
+            (GmailWatcher(), GMAIL_WATCH_INTERVAL),
+        ]
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(watcher, interval)) for watcher, interval in self.watchers]
+
+    async def _run(self, watcher, interval):
+        failing = False
+        while True:
+            await asyncio.sleep(interval)
+            if not self.connection_manager.connections:
+                continue
+
+            try:
+                update = await asyncio.to_thread(watcher.poll)
+                failing = False
+            except Exception as e:
+                if not failing:
+                    logger.warning(f"Inbox watcher '{watcher.source}' failed: {str(e)}")
+                failing = True
+                continue
+
+            if update is None:
+                continue
+
+            logger.info(f"{update['count']} new {watcher.source} message(s)")
+            if self.tool_cache is not None:
+                self.tool_cache.invalidate(watcher.source)
+            self.connection_manager.broadcast({
+                "type": "inbox_update",
+                "timestamp": datetime.now().isoformat(),
+                "execution_id": None,
+                "data": update
+            })
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for watcher, _ in self.watchers:
+            watcher.close()
@@ -1,7 +1,7 @@
 "use client"
 
-import { useEffect, useState } from "react"
-import { Loader2, Wrench, Cog, CheckCircle, MessageCircle, Activity, ChevronLeft, ChevronRight } from "lucide-react"
+import { useEffect, useRef, useState } from "react"
+import { Loader2, Wrench, Cog, CheckCircle, MessageCircle, Activity, ChevronLeft, ChevronRight, Inbox } from "lucide-react"
 import { Button } from "@/components/ui/button"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { ChatHeader } from "./ChatHeader"
@@ -21,6 +21,13 @@ interface WebSocketMessage {
     total_steps?: number
     status?: string
     result?: string
+    delta?: string
+    session_id?: string
+    resumed?: boolean
+    history?: { role: "user" | "assistant", content: string }[]
+    source?: "whatsapp" | "gmail"
+    count?: number
+    items?: { chat_name?: string, from?: string, subject?: string, preview?: string }[]
     execution_completed?: boolean
   }
 }
@@ -33,6 +40,7 @@ interface ChatMessage {
   execution_id?: string
   isToolMessage?: boolean
   isProcessing?: boolean
+  isStreaming?: boolean
   timeline?: TimelineItem[]
 }
 
@@ -55,34 +63,58 @@ export function Chat() {
   const [sidebarOpen, setSidebarOpen] = useState(false)
   const [allTimelineItems, setAllTimelineItems] = useState<TimelineItem[]>([])
 
-  // WebSocket connection
-  useEffect(() => {
-    const websocket = new WebSocket('ws://localhost:9000/ws')
+  // WebSocket connection; reconnects resume the same server-side session
+  const reconnectTimer = useRef<ReturnType<typeof setTimeout> | null>(null)
 
-    websocket.onopen = () => {
-      console.log('Connected to WebSocket')
-      setConnected(true)
-      setWs(websocket)
-    }
+  useEffect(() => {
+    let websocket: WebSocket
+    let closedByUnmount = false
+    let retryDelay = 1000
+
+    const connect = () => {
+      const sessionId = localStorage.getItem('orbit_session_id')
+      websocket = new WebSocket(`ws://localhost:9000/ws${sessionId ? `?session_id=${sessionId}` : ''}`)
+
+      websocket.onopen = () => {
+        console.log('Connected to WebSocket')
+        retryDelay = 1000
+        setConnected(true)
+        setWs(websocket)
+      }
+
+      websocket.onmessage = (event) => {
+        // Events emitted close together arrive as one array frame
+        const payload: WebSocketMessage | WebSocketMessage[] = JSON.parse(event.data)
+        for (const message of Array.isArray(payload) ? payload : [payload]) {
+          console.log('Received message:', message)
+          handleWebSocketMessage(message)
+        }
+      }
 
-    websocket.onmessage = (event) => {
-      const message: WebSocketMessage = JSON.parse(event.data)
-      console.log('Received message:', message)
-      handleWebSocketMessage(message)
-    }
+      websocket.onclose = () => {
+        console.log('WebSocket connection closed')
+        setConnected(false)
+        setWs(null)
+        setIsProcessing(false)
+        setIsTyping(false)
+        if (!closedByUnmount) {
+          // Server restarts drop the socket; come back to the same session
+          reconnectTimer.current = setTimeout(connect, retryDelay)
+          retryDelay = Math.min(retryDelay * 2, 30000)
+        }
+      }
 
-    websocket.onclose = () => {
-      console.log('WebSocket connection closed')
-      setConnected(false)
-      setWs(null)
+      websocket.onerror = (error) => {
+        console.error('WebSocket error:', error)
+        setConnected(false)
+      }
     }
 
-    websocket.onerror = (error) => {
-      console.error('WebSocket error:', error)
-      setConnected(false)
-    }
+    connect()
 
     return () => {
+      closedByUnmount = true
+      if (reconnectTimer.current) clearTimeout(reconnectTimer.current)
       websocket.close()
     }
   }, [])
@@ -91,6 +123,30 @@ export function Chat() {
     const { type, data, timestamp, execution_id } = wsMessage
 
     switch (type) {
+      case 'session':
+        if (data.session_id) localStorage.setItem('orbit_session_id', data.session_id)
+        // Redraw a resumed conversation, e.g. after a page reload
+        if (data.resumed && data.history) {
+          setMessages(prev => prev.length > 0 ? prev : data.history!.map(entry => ({
+            role: entry.role,
+            content: entry.content,
+            timestamp,
+            type: entry.role === 'user' ? 'user_input' : 'agent_response'
+          })))
+        }
+        break
+
+      case 'inbox_update':
+        // Pushed by the server when new WhatsApp messages or inbox mail arrive
+        const inboxItem: TimelineItem = {
+          type,
+          content: formatTimelineContent(type, data),
+          timestamp,
+          icon: getTimelineIcon(type)
+        }
+        setAllTimelineItems(prev => [...prev, inboxItem])
+        break
+
       case 'user_input':
         // Clear previous timeline items when new chat begins
         setAllTimelineItems([])
@@ -144,7 +200,20 @@ export function Chat() {
         const currentContent = getCurrentProcessingContent(type, data)
         setMessages(prev => prev.map(msg =>
           msg.execution_id === execution_id && msg.isProcessing
-            ? { ...msg, content: currentContent, timeline: [...currentTimeline, timelineItem] }
+            ? { ...msg, content: currentContent, isStreaming: false, timeline: [...currentTimeline, timelineItem] }
+            : msg
+        ))
+        break
+
+      case 'agent_token':
+        // Append the streamed text, replacing the status line on the first token
+        setMessages(prev => prev.map(msg =>
+          msg.execution_id === execution_id && msg.isProcessing
+            ? {
+              ...msg,
+              content: (msg.isStreaming ? msg.content : '') + (data.delta || ''),
+              isStreaming: true
+            }
             : msg
         ))
         break
@@ -157,6 +226,7 @@ export function Chat() {
               ...msg,
               content: data.message || '',
               isProcessing: false,
+              isStreaming: false,
               type: 'agent_response',
               timeline: currentTimeline
             }
@@ -170,6 +240,28 @@ export function Chat() {
         setCurrentTimeline([])
         break
 
+      case 'agent_cancelled':
+        // Keep whatever was streamed so far and mark the turn as stopped
+        setMessages(prev => prev.map(msg =>
+          msg.execution_id === execution_id && msg.isProcessing
+            ? {
+              ...msg,
+              content: msg.isStreaming ? `${msg.content}\n\n(stopped)` : 'Stopped.',
+              isProcessing: false,
+              isStreaming: false,
+              type: 'agent_cancelled',
+              timeline: currentTimeline
+            }
+            : msg
+        ))
+
+        // Clear processing state
+        setIsProcessing(false)
+        setIsTyping(false)
+        setCurrentExecutionId(null)
+        setCurrentTimeline([])
+        break
+
       case 'error':
         // Replace processing message with error
         setMessages(prev => prev.map(msg =>
@@ -197,6 +289,14 @@ export function Chat() {
     switch (type) {
       case 'agent_thinking':
         return data.message || 'Analyzing your request...'
+      case 'inbox_update': {
+        const label = data.source === 'gmail' ? 'email' : 'WhatsApp message'
+        const latest = data.items?.[0]
+        const summary = latest
+          ? ` — ${latest.chat_name || latest.from || ''}: ${latest.subject || latest.preview || ''}`
+          : ''
+        return `${data.count} new ${label}${data.count === 1 ? '' : 's'}${summary}`
+      }
       case 'tool_called':
         return `Preparing to execute ${data.tool_name || 'tool'}`
       case 'tool_executing':
@@ -253,6 +353,8 @@ export function Chat() {
         return <Cog className="w-4 h-4 text-yellow-400 animate-spin" />
       case 'tool_result':
         return <CheckCircle className="w-4 h-4 text-green-400" />
+      case 'inbox_update':
+        return <Inbox className="w-4 h-4 text-purple-400" />
       default:
         return <MessageCircle className="w-4 h-4 text-gray-400" />
     }
@@ -271,6 +373,12 @@ export function Chat() {
     setIsProcessing(true)
   }
 
+  const handleCancel = () => {
+    if (!ws || !connected || !isProcessing) return
+
+    ws.send(JSON.stringify({ type: 'cancel' }))
+  }
+
   const clearTimeline = () => {
     setAllTimelineItems([])
   }
@@ -315,6 +423,7 @@ export function Chat() {
           isProcessing={isProcessing}
           connected={connected}
           onSend={handleSend}
+          onCancel={handleCancel}
         />
       </div>
 
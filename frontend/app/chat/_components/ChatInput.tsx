@@ -1,6 +1,6 @@
 import { Input } from "@/components/ui/input"
 import { Button } from "@/components/ui/button"
-import { MessageCircle, Send, Loader2, Mic, MicOff, Paperclip } from "lucide-react"
+import { MessageCircle, Send, Loader2, Mic, MicOff, Paperclip, Square } from "lucide-react"
 import { cn } from "@/lib/utils"
 import { useState, useRef, useEffect } from "react"
 
@@ -60,9 +60,10 @@ interface ChatInputProps {
     isProcessing: boolean
     connected: boolean
     onSend: () => void
+    onCancel: () => void
 }
 
-export function ChatInput({ input, setInput, isProcessing, connected, onSend }: ChatInputProps) {
+export function ChatInput({ input, setInput, isProcessing, connected, onSend, onCancel }: ChatInputProps) {
     const [isListening, setIsListening] = useState(false)
     const [speechSupported, setSpeechSupported] = useState(false)
     const recognitionRef = useRef<SpeechRecognition | null>(null)
@@ -225,30 +226,34 @@ export function ChatInput({ input, setInput, isProcessing, connected, onSend }:
                         )}
                     </Button>
 
-                    {/* Send button */}
-                    <Button
-                        type="submit"
-                        className={cn(
-                            "px-6 py-3 rounded-2xl font-medium transition-all duration-200 min-w-[100px]",
-                            canSend
-                                ? "bg-gradient-to-r from-blue-600 to-blue-700 hover:from-blue-700 hover:to-blue-800 text-white shadow-lg hover:shadow-xl border border-blue-500/30 hover:border-blue-400/50"
-                                : "bg-gray-700/50 text-gray-400 cursor-not-allowed border border-gray-600/30"
-                        )}
-                        disabled={!canSend}
-                        onClick={onSend}
-                    >
-                        {isProcessing ? (
-                            <>
-                                <Loader2 className="w-4 h-4 mr-2 animate-spin" />
-                                Processing
-                            </>
-                        ) : (
-                            <>
-                                <Send className="w-4 h-4 mr-2" />
-                                Send
-                            </>
-                        )}
-                    </Button>
+                    {/* Send button, or stop while a request is running */}
+                    {isProcessing ? (
+                        <Button
+                            type="button"
+                            className="px-6 py-3 rounded-2xl font-medium transition-all duration-200 min-w-[100px] bg-red-500/10 hover:bg-red-500/20 text-red-300 border border-red-500/30"
+                            disabled={!connected}
+                            onClick={onCancel}
+                            title="Stop the current request"
+                        >
+                            <Square className="w-4 h-4 mr-2" />
+                            Stop
+                        </Button>
+                    ) : (
+                        <Button
+                            type="submit"
+                            className={cn(
+                                "px-6 py-3 rounded-2xl font-medium transition-all duration-200 min-w-[100px]",
+                                canSend
+                                    ? "bg-gradient-to-r from-blue-600 to-blue-700 hover:from-blue-700 hover:to-blue-800 text-white shadow-lg hover:shadow-xl border border-blue-500/30 hover:border-blue-400/50"
+                                    : "bg-gray-700/50 text-gray-400 cursor-not-allowed border border-gray-600/30"
+                            )}
+                            disabled={!canSend}
+                            onClick={onSend}
+                        >
+                            <Send className="w-4 h-4 mr-2" />
+                            Send
+                        </Button>
+                    )}
                 </div>
             </div>
 
@@ -1,13 +1,12 @@
-import os
-import pickle
-from googleapiclient.discovery import build
-from .config import TOKEN_PATH
+from .config import TOKEN_PATH, TOOL_WORKERS
+from ..google_service import GoogleServicePool
+
+# Shared by every tool call on this server; see GoogleServicePool
+service_pool = GoogleServicePool(
+    'gmail', 'v1', TOKEN_PATH,
+    max_idle=TOOL_WORKERS,
+    missing_message="Gmail credentials not found. Please authenticate via gmail_client.py first."
+)
 
 def get_gmail_service():
-    if not os.path.exists(TOKEN_PATH):
-        raise FileNotFoundError("Gmail credentials not found. Please authenticate via gmail_client.py first.")
-    
-    with open(TOKEN_PATH, 'rb') as token:
-        creds = pickle.load(token)
-    
-    return build('gmail', 'v1', credentials=creds)
\ No newline at end of file
+    return service_pool.build()
\ No newline at end of file
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from .config import BATCH_SIZE, MAX_PARALLEL_BATCHES
+
+
+def _execute_batch(service, message_ids: List[str], headers: List[str]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    results = {}
+    errors = {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            results[request_id] = response
+
+    # Runs on an executor thread where the ScopedService proxy has no client, and
+    # httplib2.Http is not thread-safe: every concurrent batch checks out its own
+    # pooled client and builds and sends its requests through it
+    with service.pool.checkout() as client:
+        batch = client.new_batch_http_request(callback=callback)
+        for message_id in message_ids:
+            batch.add(
+                client.users().messages().get(
+                    userId='me',
+                    id=message_id,
+                    format='metadata',
+                    metadataHeaders=headers
+                ),
+                request_id=message_id
+            )
+        batch.execute()
+    return results, errors
+
+
+def fetch_metadata(service, message_ids: List[str], headers: List[str]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """
+    Fetches message metadata for many IDs using Gmail batch requests.
+
+    IDs are split into batches of up to BATCH_SIZE calls, and up to
+    MAX_PARALLEL_BATCHES batches run at once. A failed message never fails
+    the others: it is reported in the returned errors instead.
+
+    Returns:
+        (metadata by message ID, error message by message ID)
+    """
+    unique_ids = list(dict.fromkeys(message_ids))
+    if not unique_ids:
+        return {}, {}
+
+    chunks = [unique_ids[i:i + BATCH_SIZE] for i in range(0, len(unique_ids), BATCH_SIZE)]
+    results = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_PARALLEL_BATCHES)) as executor:
+        futures = [(chunk, executor.submit(_execute_batch, service, chunk, headers)) for chunk in chunks]
+        for chunk, future in futures:
+            try:
+                chunk_results, chunk_errors = future.result()
+            except Exception as e:
+                # The whole batch request failed (e.g. network error)
+                chunk_results, chunk_errors = {}, {message_id: str(e) for message_id in chunk}
+            results.update(chunk_results)
+            errors.update(chunk_errors)
+
+    return results, errors
@@ -2,4 +2,23 @@ import os
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.join(SCRIPT_DIR, '..', '..')
-TOKEN_PATH = os.path.join(PROJECT_ROOT, 'secrets', 'google-auth.pickle')
\ No newline at end of file
+TOKEN_PATH = os.path.join(PROJECT_ROOT, 'secrets', 'google-auth.pickle')
+
+# Metadata fetches are grouped into Gmail batch requests (API max 100 calls each)
+BATCH_SIZE = 100
+MAX_PARALLEL_BATCHES = 4
+
+# Local metadata cache, kept fresh via users.history.list
+METADATA_DB_PATH = os.path.join(SCRIPT_DIR, 'store', 'metadata.db')
+METADATA_HEADERS = ['subject', 'from', 'date', 'to', 'cc']
+HISTORY_SYNC_INTERVAL = 15
+LIST_CACHE_TTL = 300
+
+# Blocking API calls run on a bounded thread pool with a per-tool concurrency cap
+TOOL_WORKERS = 8
+TOOL_CONCURRENCY = 4
+
+# Tool results above these sizes (in characters) are paged behind a result handle
+RESULT_PAGE_CHARS = 6000
+RESULT_PAGE_LIMITS = {'get_last_emails': 6000, 'search_emails': 8000}
+RESULT_SNIPPET_CHARS = 200
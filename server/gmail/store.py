@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from .batch import fetch_metadata
+from .config import METADATA_DB_PATH, METADATA_HEADERS, HISTORY_SYNC_INTERVAL, LIST_CACHE_TTL
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS messages (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS list_cache (
+        key TEXT PRIMARY KEY,
+        message_ids TEXT NOT NULL,
+        cached_at REAL NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+
+class MetadataStore:
+    """
+    On-disk cache of Gmail message metadata, keyed by message ID.
+
+    Message headers never change, so cached metadata stays valid until the
+    message is deleted. Freshness comes from users.history.list: starting at
+    the last seen historyId it removes deleted messages and, whenever the
+    mailbox changed at all, drops cached messages.list results. Between syncs
+    (at most every HISTORY_SYNC_INTERVAL seconds) reads make no API calls.
+    """
+
+    def __init__(self, path: str = METADATA_DB_PATH, sync_interval: float = HISTORY_SYNC_INTERVAL):
+        self.path = path
+        self.sync_interval = sync_interval
+        self._conn = None
+        self._lock = threading.RLock()
+        # Held for a whole sync, including its API calls; readers only take _lock
+        self._sync_lock = threading.Lock()
+        self._synced_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._db().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._db().execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _reset(self, profile: dict) -> None:
+        """Start over from the mailbox's current historyId."""
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM messages")
+                db.execute("DELETE FROM list_cache")
+                self._set_state('history_id', str(profile['historyId']))
+
+    def _history(self, service, start_history_id: str) -> Tuple[List[str], bool, str]:
+        """Deleted message IDs, whether anything changed, and the latest historyId since ``start_history_id``."""
+        deleted = []
+        changed = False
+        latest_history_id = start_history_id
+        page_token = None
+        while True:
+            params = {'userId': 'me', 'startHistoryId': start_history_id}
+            if page_token:
+                params['pageToken'] = page_token
+            response = service.users().history().list(**params).execute()
+
+            for record in response.get('history', []):
+                changed = True
+                for item in record.get('messagesDeleted', []):
+                    deleted.append(item['message']['id'])
+
+            latest_history_id = response.get('historyId', latest_history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return deleted, changed, latest_history_id
+
+    def sync(self, service, force: bool = False) -> None:
+        """Apply mailbox changes since the last seen historyId.
+
+        The API calls run without holding the store lock, and a call that
+        finds another sync in progress serves from the store instead of
+        waiting for it. If the sync fails, the store is still served and the
+        sync is retried after the next interval.
+        """
+        if not force and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+
+        try:
+            with self._lock:
+                start_history_id = self._get_state('history_id')
+
+            try:
+                if start_history_id is None:
+                    self._reset(service.users().getProfile(userId='me').execute())
+                    return
+
+                try:
+                    deleted, changed, latest_history_id = self._history(service, start_history_id)
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                    # historyId is too old to resume from; drop everything we know
+                    self._reset(service.users().getProfile(userId='me').execute())
+                    return
+            except Exception as e:
+                # Rate limits, 5xx and network errors: reads still work off the store
+                print(f"Gmail history sync failed, serving cached metadata: {e}")
+                return
+
+            with self._lock:
+                db = self._db()
+                with db:
+                    if deleted:
+                        db.executemany("DELETE FROM messages WHERE id = ?", [(message_id,) for message_id in deleted])
+                    if changed:
+                        db.execute("DELETE FROM list_cache")
+                    self._set_state('history_id', str(latest_history_id))
+        finally:
+            self._synced_at = time.monotonic()
+            self._sync_lock.release()
+
+    def list_message_ids(self, service, **params) -> List[str]:
+        """messages.list, served from cache while the mailbox is unchanged."""
+        key = json.dumps(params, sort_keys=True)
+        with self._lock:
+            row = self._db().execute(
+                "SELECT message_ids, cached_at FROM list_cache WHERE key = ?", (key,)
+            ).fetchone()
+            # Relative queries like newer_than:1d drift even without mailbox changes
+            if row and time.time() - row[1] < LIST_CACHE_TTL:
+                return json.loads(row[0])
+
+        results = service.users().messages().list(userId='me', **params).execute()
+        message_ids = [msg['id'] for msg in results.get('messages', [])]
+
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO list_cache (key, message_ids, cached_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(message_ids), time.time())
+                )
+        return message_ids
+
+    def get_metadata(self, service, message_ids: List[str]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """Metadata for the given IDs, fetching only cache misses from the API."""
+        with self._lock:
+            ids_json = json.dumps(list(message_ids))
+            rows = self._db().execute(
+                "SELECT id, data FROM messages WHERE id IN (SELECT value FROM json_each(?))", (ids_json,)
+            ).fetchall()
+        metadata = {message_id: json.loads(data) for message_id, data in rows}
+
+        missing = [message_id for message_id in message_ids if message_id not in metadata]
+        errors = {}
+        if missing:
+            fetched, errors = fetch_metadata(service, missing, METADATA_HEADERS)
+            metadata.update(fetched)
+            with self._lock:
+                db = self._db()
+                now = time.time()
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO messages (id, data, fetched_at) VALUES (?, ?, ?)",
+                        [(message_id, json.dumps(data), now) for message_id, data in fetched.items()]
+                    )
+
+        return metadata, errors
+
+
+store = MetadataStore()
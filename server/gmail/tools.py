@@ -1,31 +1,57 @@
 from fastmcp import FastMCP
-from .auth import get_gmail_service
+from .auth import service_pool
+from .config import TOOL_WORKERS, TOOL_CONCURRENCY, RESULT_PAGE_CHARS, RESULT_PAGE_LIMITS, RESULT_SNIPPET_CHARS
+from ..offload import BlockingToolRunner
+from ..google_service import ScopedService
+from ..results import ResultPager
+from .store import store
 from datetime import datetime
 import re
 from typing import List, Dict, Optional
 
-service = get_gmail_service()
+# Each tool call checks out its own pooled API client for its duration
+service = ScopedService(service_pool)
 mcp = FastMCP("Gmail")
+tools = BlockingToolRunner(mcp, max_workers=TOOL_WORKERS, default_limit=TOOL_CONCURRENCY, scope=service.scope)
 
-def format_email_summary(emails: List[Dict]) -> str:
-    """Format emails into a readable summary"""
-    if not emails:
-        return "No emails found."
+# Large listings come back one page at a time; the rest is read via gmail_read_result_page
+results = ResultPager('gmail_read_result_page', RESULT_PAGE_CHARS, RESULT_PAGE_LIMITS, max_field_chars=RESULT_SNIPPET_CHARS)
+results.register(mcp)
+
+def list_emails(**search_params) -> tuple:
+    """List messages and their headers as compact dicts, plus any per-message fetch errors"""
+    # Serve the listing and headers from the local store, fetching only deltas
+    store.sync(service)
+    message_ids = store.list_message_ids(service, **search_params)
+    metadata, errors = store.get_metadata(service, message_ids)
+    emails = []
     
-    summary = f"Found {len(emails)} emails:\n\n"
-    for i, email in enumerate(emails, 1):
-        summary += f"{i}. From: {email['from']}\n"
-        summary += f"   Subject: {email['subject']}\n"
-        summary += f"   Date: {email['date']}\n"
-        summary += f"   Preview: {email['snippet'][:100]}...\n\n"
-    return summary
+    for message_id in message_ids:
+        msg_data = metadata.get(message_id)
+        if msg_data is None:
+            continue
+        
+        headers = {h['name'].lower(): h['value'] for h in msg_data['payload'].get('headers', [])}
+        thread_id = msg_data.get('threadId', '')
+        emails.append({
+            'id': message_id,
+            'from': headers.get('from', 'Unknown Sender'),
+            'subject': headers.get('subject', 'No Subject'),
+            'date': headers.get('date', ''),
+            'to': headers.get('to', ''),
+            'cc': headers.get('cc', ''),
+            # A thread's first message shares its ID; only repeat it when it differs
+            'thread_id': thread_id if thread_id != message_id else '',
+            'snippet': msg_data.get('snippet', '')
+        })
+    return emails, errors
 
 def extract_email_addresses(text: str) -> List[str]:
     """Extract email addresses from text"""
     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
     return re.findall(email_pattern, text)
 
-@mcp.tool()
+@tools.tool()
 def get_last_emails(count: int = 10, query: str = "") -> dict:
     """
     Fetches the last N emails from the user's Gmail inbox.
@@ -39,51 +65,26 @@ def get_last_emails(count: int = 10, query: str = "") -> dict:
         
         # Build search query
         search_params = {
-            'userId': 'me',
             'maxResults': count,
             'labelIds': ['INBOX']
         }
         
         if query:
             search_params['q'] = query
-            
-        results = service.users().messages().list(**search_params).execute()
-        messages = results.get('messages', [])
-        emails = []
-        
-        for msg in messages:
-            msg_data = service.users().messages().get(
-                userId='me', 
-                id=msg['id'], 
-                format='metadata', 
-                metadataHeaders=['subject', 'from', 'date', 'to', 'cc']
-            ).execute()
-            
-            headers = {h['name'].lower(): h['value'] for h in msg_data['payload'].get('headers', [])}
-            emails.append({
-                'id': msg['id'],
-                'snippet': msg_data.get('snippet', ''),
-                'subject': headers.get('subject', 'No Subject'),
-                'from': headers.get('from', 'Unknown Sender'),
-                'to': headers.get('to', ''),
-                'cc': headers.get('cc', ''),
-                'date': headers.get('date', ''),
-                'thread_id': msg_data.get('threadId', '')
-            })
-        
-        formatted_summary = format_email_summary(emails)
         
-        return {
-            'status': 'success', 
-            'count': len(emails),
-            'emails': emails,
-            'summary': formatted_summary,
-            'search_query': query if query else 'inbox'
-        }
+        emails, errors = list_emails(**search_params)
+        response = results.shape_items(
+            'get_last_emails', emails, key='emails',
+            status='success',
+            search_query=query if query else 'inbox'
+        )
+        if errors:
+            response['errors'] = errors
+        return response
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
-@mcp.tool()
+@tools.tool()
 def send_email(to: str, subject: str = "", body: str = "", cc: str = "", bcc: str = "") -> dict:
     """
     Sends an email using the user's Gmail account with smart defaults.
@@ -142,7 +143,7 @@ def send_email(to: str, subject: str = "", body: str = "", cc: str = "", bcc: st
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
-@mcp.tool()
+@tools.tool()
 def forward_emails_summary(email_ids: List[str], to: str, custom_subject: str = "", custom_message: str = "") -> dict:
     """
     Forwards a summary of multiple emails to a recipient.
@@ -154,27 +155,24 @@ def forward_emails_summary(email_ids: List[str], to: str, custom_subject: str =
         custom_message: Custom message to add before the summary (optional)
     """
     try:
-        # Get email details
+        # Get email details from the local store, batch-fetching any misses
+        metadata, errors = store.get_metadata(service, email_ids)
+        for email_id, error in errors.items():
+            print(f"Error fetching email {email_id}: {error}")
+        
         emails_data = []
         for email_id in email_ids:
-            try:
-                msg_data = service.users().messages().get(
-                    userId='me', 
-                    id=email_id, 
-                    format='metadata', 
-                    metadataHeaders=['subject', 'from', 'date']
-                ).execute()
-                
-                headers = {h['name'].lower(): h['value'] for h in msg_data['payload'].get('headers', [])}
-                emails_data.append({
-                    'subject': headers.get('subject', 'No Subject'),
-                    'from': headers.get('from', 'Unknown Sender'),
-                    'date': headers.get('date', ''),
-                    'snippet': msg_data.get('snippet', '')
-                })
-            except Exception as e:
-                print(f"Error fetching email {email_id}: {e}")
+            msg_data = metadata.get(email_id)
+            if msg_data is None:
                 continue
+            
+            headers = {h['name'].lower(): h['value'] for h in msg_data['payload'].get('headers', [])}
+            emails_data.append({
+                'subject': headers.get('subject', 'No Subject'),
+                'from': headers.get('from', 'Unknown Sender'),
+                'date': headers.get('date', ''),
+                'snippet': msg_data.get('snippet', '')
+            })
         
         if not emails_data:
             return {'status': 'error', 'message': 'No valid emails found to forward'}
@@ -202,7 +200,7 @@ def forward_emails_summary(email_ids: List[str], to: str, custom_subject: str =
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
-@mcp.tool()
+@tools.tool()
 def smart_email_action(action: str, details: str = "") -> dict:
     """
     Intelligent email handler that can perform complex multi-step operations based on natural language.
@@ -233,20 +231,17 @@ def smart_email_action(action: str, details: str = "") -> dict:
                 to_email = found_emails[0]
                 
                 # Get the emails
-                recent_emails = get_last_emails(count=count)
-                if recent_emails['status'] == 'success':
-                    email_ids = [email['id'] for email in recent_emails['emails']]
-                    
-                    # Forward summary
-                    subject = f"Last {count} emails summary - {datetime.now().strftime('%Y-%m-%d')}"
-                    return forward_emails_summary(
-                        email_ids=email_ids,
-                        to=to_email,
-                        custom_subject=subject,
-                        custom_message=f"As requested, here are the last {count} emails from the inbox:"
-                    )
-                else:
-                    return recent_emails
+                recent_emails, _ = list_emails(maxResults=min(max(1, count), 50), labelIds=['INBOX'])
+                email_ids = [email['id'] for email in recent_emails]
+                
+                # Forward summary
+                subject = f"Last {count} emails summary - {datetime.now().strftime('%Y-%m-%d')}"
+                return forward_emails_summary(
+                    email_ids=email_ids,
+                    to=to_email,
+                    custom_subject=subject,
+                    custom_message=f"As requested, here are the last {count} emails from the inbox:"
+                )
             else:
                 return {'status': 'error', 'message': 'No recipient email address found in the request'}
         
@@ -279,14 +274,13 @@ def smart_email_action(action: str, details: str = "") -> dict:
         # Pattern: "forward emails to X"
         elif "forward" in action_lower and found_emails:
             # Get recent emails and forward
-            recent_emails = get_last_emails(count=5)
-            if recent_emails['status'] == 'success':
-                email_ids = [email['id'] for email in recent_emails['emails']]
-                return forward_emails_summary(
-                    email_ids=email_ids,
-                    to=found_emails[0],
-                    custom_message="Forwarding recent emails as requested:"
-                )
+            recent_emails, _ = list_emails(maxResults=5, labelIds=['INBOX'])
+            email_ids = [email['id'] for email in recent_emails]
+            return forward_emails_summary(
+                email_ids=email_ids,
+                to=found_emails[0],
+                custom_message="Forwarding recent emails as requested:"
+            )
         
         else:
             return {
@@ -297,7 +291,7 @@ def smart_email_action(action: str, details: str = "") -> dict:
     except Exception as e:
         return {'status': 'error', 'message': f'Error processing smart action: {str(e)}'}
 
-@mcp.tool()
+@tools.tool()
 def search_emails(query: str, max_results: int = 20) -> dict:
     """
     Advanced email search with Gmail query syntax support.
@@ -314,43 +308,11 @@ def search_emails(query: str, max_results: int = 20) -> dict:
     try:
         max_results = min(max(1, max_results), 100)
         
-        results = service.users().messages().list(
-            userId='me',
-            q=query,
-            maxResults=max_results
-        ).execute()
-        
-        messages = results.get('messages', [])
-        emails = []
-        
-        for msg in messages:
-            msg_data = service.users().messages().get(
-                userId='me',
-                id=msg['id'],
-                format='metadata',
-                metadataHeaders=['subject', 'from', 'date', 'to']
-            ).execute()
-            
-            headers = {h['name'].lower(): h['value'] for h in msg_data['payload'].get('headers', [])}
-            emails.append({
-                'id': msg['id'],
-                'snippet': msg_data.get('snippet', ''),
-                'subject': headers.get('subject', 'No Subject'),
-                'from': headers.get('from', 'Unknown Sender'),
-                'to': headers.get('to', ''),
-                'date': headers.get('date', ''),
-                'thread_id': msg_data.get('threadId', '')
-            })
-        
-        formatted_summary = format_email_summary(emails)
-        
-        return {
-            'status': 'success',
-            'count': len(emails),
-            'emails': emails,
-            'summary': formatted_summary,
-            'query': query
-        }
+        emails, errors = list_emails(q=query, maxResults=max_results)
+        response = results.shape_items('search_emails', emails, key='emails', status='success', query=query)
+        if errors:
+            response['errors'] = errors
+        return response
         
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
\ No newline at end of file
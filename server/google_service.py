@@ -0,0 +1,119 @@
+import os
+import pickle
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import httplib2
+from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+
+class GoogleServicePool:
+    """Pool of Google API clients sharing one set of OAuth credentials.
+
+    Every pooled client owns its own ``httplib2.Http`` (which is not
+    thread-safe) so a checked-out client is used by one thread at a time,
+    while its keep-alive connections are reused across calls. Checkout
+    never blocks: when no client is idle a new one is built, and at most
+    ``max_idle`` clients are kept afterwards. Expired credentials are
+    refreshed once, under a lock, before a client is handed out and the
+    refreshed token is written back to ``token_path``.
+    """
+
+    def __init__(self, api: str, version: str, token_path: str, max_idle: int = 8, missing_message: str = None, timeout: float = 60):
+        self.api = api
+        self.version = version
+        self.token_path = token_path
+        self.max_idle = max_idle
+        self.missing_message = missing_message or f"Google credentials not found at {token_path}."
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    def _load_credentials(self):
+        if not os.path.exists(self.token_path):
+            raise FileNotFoundError(self.missing_message)
+
+        with open(self.token_path, 'rb') as token:
+            return pickle.load(token)
+
+    def _save_credentials(self, creds) -> None:
+        # Atomic replace so the other servers never read a half-written token
+        directory = os.path.dirname(self.token_path)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as token:
+            pickle.dump(creds, token)
+        os.replace(token.name, self.token_path)
+
+    def credentials(self):
+        """Shared credentials, refreshed if they expired."""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+
+            creds = self._credentials
+            if not creds.valid and creds.refresh_token:
+                creds.refresh(Request())
+                self._save_credentials(creds)
+            return creds
+
+    def build(self):
+        """Build a new client with its own HTTP connection."""
+        http = AuthorizedHttp(self.credentials(), http=httplib2.Http(timeout=self.timeout))
+        return build(self.api, self.version, http=http, cache_discovery=False)
+
+    @contextmanager
+    def checkout(self):
+        try:
+            service = self._idle.get_nowait()
+        except queue.Empty:
+            service = self.build()
+        else:
+            try:
+                # Make sure the token is fresh before the client is used
+                self.credentials()
+            except Exception:
+                # Keep the idle client for the next checkout
+                self._idle.put(service)
+                raise
+
+        try:
+            yield service
+        finally:
+            if self._idle.qsize() < self.max_idle:
+                self._idle.put(service)
+
+
+class ScopedService:
+    """Proxy resolving to the client checked out for the current tool call.
+
+    Tool bodies keep writing ``service.users()...``; ``scope()`` checks a
+    client out of the pool for the duration of one call on this thread.
+    """
+
+    def __init__(self, pool: GoogleServicePool):
+        self.pool = pool
+        self._local = threading.local()
+
+    @contextmanager
+    def scope(self):
+        if getattr(self._local, "service", None) is not None:
+            # Nested tool call on the same thread reuses the outer client
+            yield self._local.service
+            return
+
+        with self.pool.checkout() as service:
+            self._local.service = service
+            try:
+                yield service
+            finally:
+                self._local.service = None
+
+    def __getattr__(self, name):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            raise RuntimeError(f"No {self.pool.api} client checked out; call this inside service.scope()")
+        return getattr(service, name)
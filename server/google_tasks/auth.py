@@ -1,13 +1,12 @@
-import os
-import pickle
-from googleapiclient.discovery import build
-from .config import TOKEN_PATH
+from .config import TOKEN_PATH, TOOL_WORKERS
+from ..google_service import GoogleServicePool
+
+# Shared by every tool call on this server; see GoogleServicePool
+service_pool = GoogleServicePool(
+    'tasks', 'v1', TOKEN_PATH,
+    max_idle=TOOL_WORKERS,
+    missing_message="Google credentials not found. Please authenticate via client.py first."
+)
 
 def get_tasks_service():
-    if not os.path.exists(TOKEN_PATH):
-        raise FileNotFoundError("Google credentials not found. Please authenticate via client.py first.")
-    
-    with open(TOKEN_PATH, 'rb') as token:
-        creds = pickle.load(token)
-    
-    return build('tasks', 'v1', credentials=creds)
\ No newline at end of file
+    return service_pool.build()
\ No newline at end of file
@@ -3,3 +3,7 @@ import os
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.join(SCRIPT_DIR, '..', '..')
 TOKEN_PATH = os.path.join(PROJECT_ROOT, 'secrets', 'google-auth.pickle')
+
+# Blocking API calls run on a bounded thread pool with a per-tool concurrency cap
+TOOL_WORKERS = 8
+TOOL_CONCURRENCY = 4
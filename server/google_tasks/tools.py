@@ -1,11 +1,16 @@
 from fastmcp import FastMCP
-from .auth import get_tasks_service
+from .auth import service_pool
+from .config import TOOL_WORKERS, TOOL_CONCURRENCY
+from ..offload import BlockingToolRunner
+from ..google_service import ScopedService
 
-service = get_tasks_service()
+# Each tool call checks out its own pooled API client for its duration
+service = ScopedService(service_pool)
 mcp = FastMCP("Google-Tasks")
+tools = BlockingToolRunner(mcp, max_workers=TOOL_WORKERS, default_limit=TOOL_CONCURRENCY, scope=service.scope)
 
 # TaskList Tools
-@mcp.tool()
+@tools.tool()
 def create_tasklist(title: str) -> dict:
     """Creates a new Google Task List with the given title."""
     try:
@@ -20,7 +25,7 @@ def create_tasklist(title: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def get_tasklist(tasklist_id: str) -> dict:
     """Gets a specific Google Task List by ID."""
     try:
@@ -34,7 +39,7 @@ def get_tasklist(tasklist_id: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def delete_tasklist(tasklist_id: str) -> dict:
     """Deletes a Google Task List by ID."""
     try:
@@ -43,7 +48,7 @@ def delete_tasklist(tasklist_id: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def list_tasklists() -> dict:
     """Lists all Google Task Lists for the authenticated user."""
     try:
@@ -67,7 +72,7 @@ def list_tasklists() -> dict:
         return {"status": "error", "message": str(e)}
 
 # Task Tools
-@mcp.tool()
+@tools.tool()
 def create_task(tasklist_id: str, title: str, notes: str = None, due: str = None, parent: str = None) -> dict:
     """Creates a new task in the specified task list."""
     try:
@@ -92,7 +97,7 @@ def create_task(tasklist_id: str, title: str, notes: str = None, due: str = None
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def get_task(tasklist_id: str, task_id: str) -> dict:
     """Gets a specific task by ID from a task list."""
     try:
@@ -112,7 +117,7 @@ def get_task(tasklist_id: str, task_id: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def delete_task(tasklist_id: str, task_id: str) -> dict:
     """Deletes a task from a task list."""
     try:
@@ -121,7 +126,7 @@ def delete_task(tasklist_id: str, task_id: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@mcp.tool()
+@tools.tool()
 def list_tasks(tasklist_id: str, show_completed: bool = False, show_deleted: bool = False, max_results: int = 100) -> dict:
     """Lists tasks in a specific task list."""
     try:
@@ -0,0 +1,47 @@
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BlockingToolRunner:
+    """Registers blocking functions as async MCP tools.
+
+    Each call runs on a bounded thread pool, so a slow Google API request no
+    longer stalls the FastMCP event loop, and each tool has its own semaphore
+    capping how many of its calls may be in flight at once. ``scope`` is an
+    optional context manager factory entered on the worker thread around
+    every call, e.g. to check out a request-scoped API client.
+    """
+
+    def __init__(self, mcp, max_workers: int, default_limit: int, scope=None):
+        self.mcp = mcp
+        self.default_limit = default_limit
+        self.scope = scope or contextlib.nullcontext
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{mcp.name}-tool")
+        self.semaphores = {}
+
+    def _call(self, func, args, kwargs):
+        with self.scope():
+            return func(*args, **kwargs)
+
+    def tool(self, limit: int = None):
+        """Decorator: expose ``func`` as an async tool and return ``func`` unchanged.
+
+        Returning the plain function keeps it callable from other tools
+        (which already run on a worker thread).
+        """
+        def decorator(func):
+            semaphore = asyncio.Semaphore(limit or self.default_limit)
+            self.semaphores[func.__name__] = semaphore
+
+            @functools.wraps(func)
+            async def run(*args, **kwargs):
+                async with semaphore:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self.executor, self._call, func, args, kwargs)
+
+            self.mcp.tool()(run)
+            return func
+
+        return decorator
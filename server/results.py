@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class ResultPager:
+    """Caps tool results and keeps the overflow behind a result handle.
+
+    Results larger than a tool's character cap are cut into pages, item
+    lists by serialized size and text at line boundaries. The first page is
+    returned with a ``result_handle`` that the agent passes to the server's
+    page tool to read on from ``next_offset``. Handles live in memory for
+    ``ttl`` seconds and at most ``max_handles`` are kept. A trailing
+    ``next_cursor:`` line of a text result is repeated on every page.
+    """
+
+    TRAILER_PREFIX = "next_cursor:"
+
+    def __init__(self, page_tool: str, default_chars: int, limits: dict = None, max_field_chars: int = 500, ttl: float = 900, max_handles: int = 64):
+        self.page_tool = page_tool
+        self.default_chars = default_chars
+        self.limits = limits or {}
+        self.max_field_chars = max_field_chars
+        self.ttl = ttl
+        self.max_handles = max_handles
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compact(self, item: dict) -> dict:
+        """Drop empty fields and clip long string values."""
+        compacted = {}
+        for key, value in item.items():
+            if value in (None, "", [], {}):
+                continue
+            if isinstance(value, str) and len(value) > self.max_field_chars:
+                value = value[:self.max_field_chars] + "..."
+            compacted[key] = value
+        return compacted
+
+    def _split_trailer(self, text: str):
+        body = text.rstrip("\n")
+        start = body.rfind("\n") + 1
+        if body[start:].startswith(self.TRAILER_PREFIX):
+            return body[:start], body[start:]
+        return text, None
+
+    def _store(self, tool: str, kind: str, data, key: str = None, trailer: str = None) -> str:
+        handle = uuid.uuid4().hex[:12]
+        now = time.monotonic()
+        with self._lock:
+            for old in [h for h, entry in self._results.items() if entry["expires"] < now]:
+                del self._results[old]
+            self._results[handle] = {"tool": tool, "kind": kind, "data": data, "key": key, "trailer": trailer, "expires": now + self.ttl}
+            while len(self._results) > self.max_handles:
+                self._results.popitem(last=False)
+        return handle
+
+    def _item_page(self, items: list, offset: int, limit: int):
+        page, size = [], 0
+        for item in items[offset:]:
+            item_size = len(json.dumps(item, default=str))
+            if page and size + item_size > limit:
+                break
+            page.append(item)
+            size += item_size
+        next_offset = offset + len(page)
+        return page, (next_offset if next_offset < len(items) else None)
+
+    def _text_page(self, text: str, offset: int, limit: int):
+        end = offset + limit
+        if end >= len(text):
+            return text[offset:], None
+        # Break after the last complete line that fits, if there is one
+        newline = text.rfind("\n", offset, end)
+        if newline > offset:
+            end = newline + 1
+        return text[offset:end], end
+
+    def shape_items(self, tool: str, items: list, key: str = "items", **fields) -> dict:
+        """Return ``fields`` plus the first page of compacted ``items`` under ``key``."""
+        items = [self.compact(item) for item in items]
+        page, next_offset = self._item_page(items, 0, self.limits.get(tool, self.default_chars))
+
+        result = dict(fields)
+        result[key] = page
+        result["count"] = len(page)
+        if next_offset is not None:
+            result["total"] = len(items)
+            result["result_handle"] = self._store(tool, "items", items, key)
+            result["next_offset"] = next_offset
+            result["more"] = f"Call {self.page_tool} with this result_handle and offset to read the remaining {len(items) - next_offset}"
+        return result
+
+    def shape_text(self, tool: str, text: str) -> str:
+        """Return the first page of ``text``, with a hint on how to read the rest."""
+        if not isinstance(text, str):
+            # e.g. the empty list tools return on a database error
+            return text
+        body, trailer = self._split_trailer(text)
+        page, next_offset = self._text_page(body, 0, self.limits.get(tool, self.default_chars))
+        if next_offset is None:
+            return text
+
+        handle = self._store(tool, "text", body, trailer=trailer)
+        page += f"\n[{len(body) - next_offset} more characters: call {self.page_tool}(result_handle=\"{handle}\", offset={next_offset})]"
+        if trailer:
+            # The cursor continues the underlying query, so keep it visible on every page
+            page += f"\n{trailer}\n"
+        return page
+
+    def page(self, result_handle: str, offset: int = 0) -> dict:
+        """Read a stored result from ``offset`` with the same cap as the original tool call."""
+        with self._lock:
+            entry = self._results.get(result_handle)
+            if entry is None or entry["expires"] < time.monotonic():
+                self._results.pop(result_handle, None)
+                return {"status": "error", "message": f"Unknown or expired result_handle: {result_handle}. Call the original tool again."}
+            entry["expires"] = time.monotonic() + self.ttl
+
+        limit = self.limits.get(entry["tool"], self.default_chars)
+        data = entry["data"]
+        offset = max(0, offset)
+
+        if entry["kind"] == "items":
+            content, next_offset = self._item_page(data, offset, limit)
+            result = {entry["key"]: content, "count": len(content), "total": len(data)}
+        else:
+            content, next_offset = self._text_page(data, offset, limit)
+            if entry["trailer"]:
+                content = content.rstrip("\n") + f"\n{entry['trailer']}\n"
+            result = {"text": content}
+
+        result["result_handle"] = result_handle
+        result["next_offset"] = next_offset
+        return result
+
+    def register(self, mcp) -> None:
+        """Add this pager's page tool to a FastMCP server."""
+        def read_result_page(result_handle: str, offset: int = 0) -> dict:
+            """Read more of a large tool result that was cut off.
+
+            Args:
+                result_handle: The result_handle returned by the original tool call
+                offset: The next_offset returned with the previous page
+            """
+            return self.page(result_handle, offset)
+
+        mcp.tool(name=self.page_tool)(read_result_page)
@@ -1,6 +1,13 @@
 import os
+import time
+import asyncio
+import hashlib
 import subprocess
 import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_TRANSCODE_WORKERS, AUDIO_CACHE_EVICT_GRACE
 
 def convert_to_opus_ogg(input_file, output_file=None, bitrate="32k", sample_rate=24000):
     """
@@ -92,12 +99,129 @@ def convert_to_opus_ogg_temp(input_file, bitrate="32k", sample_rate=24000):
         raise e
 
 
+def _file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscodeCache:
+    """Content-addressed cache of Opus conversions, transcoded on a process pool.
+
+    Outputs are named after the SHA-256 of the input bytes plus the encoding
+    parameters, so re-sending the same audio skips ffmpeg entirely. Concurrent
+    requests for the same key share one conversion. Once the cache grows past
+    ``max_bytes`` the least recently used files are deleted, which also keeps
+    converted files from piling up in the temp directory. Files returned
+    within the last ``evict_grace`` seconds are left alone, since a send may
+    still be reading them.
+    """
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES, workers=AUDIO_TRANSCODE_WORKERS, evict_grace=AUDIO_CACHE_EVICT_GRACE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.evict_grace = evict_grace
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._executor = None
+        self._pending = {}
+
+    def _get_executor(self):
+        if self._executor is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Partial outputs left behind by a crashed worker
+            for name in os.listdir(self.cache_dir):
+                if ".tmp" in name:
+                    os.unlink(os.path.join(self.cache_dir, name))
+            # spawn: forking a process that runs threads is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".ogg") and ".tmp" not in name and path != keep:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries) + os.path.getsize(keep)
+        in_use_after = time.time() - self.evict_grace
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or mtime > in_use_after:
+                # Sorted by mtime, so everything after this was used recently too
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    async def convert(self, input_file, bitrate="32k", sample_rate=24000):
+        """Return the path of ``input_file`` converted to Opus/Ogg, converting only on a cache miss."""
+        if not os.path.isfile(input_file):
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        digest = await asyncio.to_thread(_file_digest, input_file)
+        key = f"{digest}-{bitrate}-{sample_rate}"
+        output_file = os.path.join(self.cache_dir, key + ".ogg")
+
+        try:
+            # mtime doubles as the LRU timestamp and protects the file from eviction while it is sent
+            os.utime(output_file)
+        except FileNotFoundError:
+            pass
+        else:
+            self.hits += 1
+            return output_file
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = loop.create_future()
+        self._pending[key] = future
+        temp_file = os.path.join(self.cache_dir, f"{key}.tmp{os.getpid()}.ogg")
+        try:
+            await loop.run_in_executor(executor, convert_to_opus_ogg, input_file, temp_file, bitrate, sample_rate)
+            os.replace(temp_file, output_file)
+            await asyncio.to_thread(self._evict, output_file)
+            future.set_result(output_file)
+            return output_file
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters have the exception; don't warn about it being unretrieved
+            future.exception()
+            if os.path.exists(temp_file):
+                os.unlink(temp_file)
+            raise
+        finally:
+            del self._pending[key]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+transcode_cache = TranscodeCache()
+
 if __name__ == "__main__":
     # Example usage
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python audio.py input_file [output_file]")
+        print("Usage: python -m server.whatsapp.audio input_file")
         sys.exit(1)
     
     input_file = sys.argv[1]
@@ -0,0 +1,85 @@
+import asyncio
+import random
+import weakref
+from typing import Any, Dict, Tuple
+
+import httpx
+
+from .config import (
+    WHATSAPP_API_BASE_URL,
+    BRIDGE_TIMEOUT,
+    BRIDGE_CONNECT_TIMEOUT,
+    BRIDGE_MAX_CONNECTIONS,
+    BRIDGE_RETRIES,
+    BRIDGE_BACKOFF
+)
+
+
+class BridgeClient:
+    """Shared async HTTP client for the Go bridge's REST API.
+
+    One ``httpx.AsyncClient`` keeps keep-alive connections to the bridge
+    for every call. Requests time out instead of hanging a tool forever.
+    Calls that failed to connect are retried with jittered exponential
+    backoff. A 5xx answer or a read timeout is only retried for
+    ``idempotent`` calls, since the bridge may already have sent the
+    message. Each event loop gets its own client, as an AsyncClient cannot
+    be shared between loops.
+    """
+
+    def __init__(self, base_url: str = WHATSAPP_API_BASE_URL, retries: int = BRIDGE_RETRIES, backoff: float = BRIDGE_BACKOFF):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        # Dropped together with their loop, so a finished loop's client is not kept around
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # An AsyncClient is tied to the event loop it was first used on
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(BRIDGE_TIMEOUT, connect=BRIDGE_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=BRIDGE_MAX_CONNECTIONS, max_keepalive_connections=BRIDGE_MAX_CONNECTIONS)
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _sleep(self, attempt: int) -> None:
+        await asyncio.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    async def post(self, path: str, payload: Dict[str, Any], idempotent: bool = False) -> Tuple[int, Any]:
+        """POST ``payload`` as JSON and return ``(status_code, parsed JSON or text)``.
+
+        Raises ``httpx.HTTPError`` once the retries are used up.
+        """
+        client = self._get_client()
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await client.post(path, json=payload)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Nothing reached the bridge, so this is safe to repeat
+                if last_attempt:
+                    raise
+            except httpx.TimeoutException:
+                if last_attempt or not idempotent:
+                    raise
+            else:
+                if response.status_code < 500 or last_attempt or not idempotent:
+                    try:
+                        return response.status_code, response.json()
+                    except ValueError:
+                        return response.status_code, response.text
+            await self._sleep(attempt)
+
+    async def close(self) -> None:
+        """Close the client of the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+bridge = BridgeClient()
@@ -1,4 +1,49 @@
 import os.path
 
 MESSAGES_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'whatsapp-bridge', 'store', 'messages.db')
-WHATSAPP_API_BASE_URL = "http://localhost:8080/api"
\ No newline at end of file
+WHATSAPP_API_BASE_URL = "http://localhost:8080/api"
+
+# Pooled HTTP client for the Go bridge
+BRIDGE_TIMEOUT = 30.0
+BRIDGE_CONNECT_TIMEOUT = 5.0
+BRIDGE_MAX_CONNECTIONS = 10
+BRIDGE_RETRIES = 3
+BRIDGE_BACKOFF = 0.5
+SEND_BATCH_CONCURRENCY = 4
+
+# Opus conversions for send_audio_message, cached by input content
+AUDIO_CACHE_DIR = os.path.join(os.path.dirname(MESSAGES_DB_PATH), 'audio-cache')
+AUDIO_CACHE_MAX_BYTES = 200 * 1024 * 1024
+AUDIO_TRANSCODE_WORKERS = 2
+# Files used this recently are never evicted, so a send still reading one keeps it
+AUDIO_CACHE_EVICT_GRACE = 300.0
+
+# Index of media the bridge downloaded, with a disk quota over those files
+MEDIA_CACHE_DB_PATH = os.path.join(os.path.dirname(MESSAGES_DB_PATH), 'media_cache.db')
+MEDIA_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Read-only connection pool for messages.db
+DB_POOL_SIZE = 4
+DB_POOL_TIMEOUT = 2.0
+DB_BUSY_TIMEOUT = 5.0
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHED_STATEMENTS = 256
+
+# In-process JID -> display name cache
+SENDER_NAME_CACHE_SIZE = 5000
+SENDER_NAME_CHECK_INTERVAL = 2.0
+
+# Sidecar FTS5 index over message content, sender and chat name
+SEARCH_DB_PATH = os.path.join(os.path.dirname(MESSAGES_DB_PATH), 'search.db')
+SEARCH_SYNC_INTERVAL = 2.0
+SEARCH_SYNC_BATCH_SIZE = 5000
+
+# Sidecar index of chats by normalized phone digits, for exact and suffix number lookups
+CONTACTS_DB_PATH = os.path.join(os.path.dirname(MESSAGES_DB_PATH), 'contacts.db')
+CONTACTS_SYNC_INTERVAL = 2.0
+# Shortest local number (no country code) matched as a suffix of a stored number
+MIN_SUFFIX_DIGITS = 7
+
+# Tool results above these sizes (in characters) are paged behind a result handle
+RESULT_PAGE_CHARS = 6000
+RESULT_PAGE_LIMITS = {"list_messages": 6000, "search_messages": 6000}
@@ -0,0 +1,172 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from .config import (
+    MESSAGES_DB_PATH,
+    CONTACTS_DB_PATH,
+    CONTACTS_SYNC_INTERVAL,
+    MIN_SUFFIX_DIGITS,
+    DB_BUSY_TIMEOUT
+)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS contacts (
+        jid TEXT PRIMARY KEY,
+        name TEXT,
+        digits TEXT NOT NULL,
+        reversed_digits TEXT NOT NULL,
+        is_group INTEGER NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS contacts_digits ON contacts (digits);
+    CREATE INDEX IF NOT EXISTS contacts_reversed_digits ON contacts (reversed_digits);
+"""
+
+# Upsert new and renamed chats, then drop deleted ones; jid_digits is registered on the writer
+SYNC_STATEMENTS = [
+    """
+    INSERT INTO contacts (jid, name, digits, reversed_digits, is_group)
+    SELECT c.jid, c.name, jid_digits(c.jid), reverse_text(jid_digits(c.jid)), c.jid LIKE '%@g.us'
+    FROM msgs.chats c
+    WHERE NOT EXISTS (SELECT 1 FROM contacts k WHERE k.jid = c.jid AND k.name IS c.name)
+    ON CONFLICT (jid) DO UPDATE SET name = excluded.name
+    """,
+    """
+    DELETE FROM contacts WHERE jid NOT IN (SELECT jid FROM msgs.chats)
+    """
+]
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def jid_digits(jid: Optional[str]) -> str:
+    """Digits of a JID's user part ("4915112345678:12@s.whatsapp.net" -> "4915112345678")."""
+    if not jid:
+        return ""
+    user = jid.split("@", 1)[0].split(":", 1)[0]
+    return _NON_DIGITS.sub("", user)
+
+
+def normalize_phone(value: str) -> str:
+    """Digits of a phone number or JID typed by a user, without the "+"/"00" international prefix."""
+    digits = jid_digits(value)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    return digits
+
+
+def phone_match(value: str, alias: str = "k", prefix: bool = False, min_suffix: int = MIN_SUFFIX_DIGITS) -> Optional[Tuple[str, list]]:
+    """WHERE fragment matching contacts whose number equals, or ends with, ``value``.
+
+    Both conditions are index range scans. Suffix matching (a local number
+    without country code, leading trunk zeros dropped) needs at least
+    ``min_suffix`` digits so short inputs cannot match unrelated numbers;
+    ``prefix`` also allows numbers starting with ``value``, for search.
+    Returns None if ``value`` contains no digits.
+    """
+    digits = normalize_phone(value)
+    if not digits:
+        return None
+
+    clauses = [f"{alias}.digits = ?"]
+    params = [digits]
+
+    local = digits.lstrip("0")
+    if len(local) >= min_suffix:
+        reversed_local = local[::-1]
+        # ":" sorts right after "9", closing the range over every digit string
+        clauses.append(f"({alias}.reversed_digits >= ? AND {alias}.reversed_digits < ?)")
+        params.extend([reversed_local, reversed_local + ":"])
+
+    if prefix and len(digits) >= min_suffix:
+        clauses.append(f"({alias}.digits >= ? AND {alias}.digits < ?)")
+        params.extend([digits, digits + ":"])
+
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+# Errors that mean messages.db does not have the shape the sync expects; retrying won't help
+STRUCTURAL_ERRORS = ("no such table", "no such column")
+
+
+class ContactIndex:
+    """Sidecar table of chats keyed by normalized phone digits.
+
+    Like the search index it lives next to messages.db (in contacts.db),
+    because the bridge owns messages.db. It is re-synced from ``chats``
+    whenever SQLite reports that another connection committed, at most every
+    ``check_interval`` seconds; chats is small, so the sync runs inline.
+    A sync that fails because a database is locked or busy is retried on the
+    next check; only a schema mismatch disables the index.
+    """
+
+    def __init__(self, path: str = CONTACTS_DB_PATH, source_path: str = MESSAGES_DB_PATH, check_interval: float = CONTACTS_SYNC_INTERVAL):
+        self.path = path
+        self.source_path = source_path
+        self.check_interval = check_interval
+        self.available = True
+        self._conn = None
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._checked_at = 0.0
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.create_function("jid_digits", 1, jid_digits, deterministic=True)
+            conn.create_function("reverse_text", 1, lambda text: text[::-1], deterministic=True)
+            conn.execute("ATTACH DATABASE ? AS msgs", (f"file:{self.source_path}?mode=ro",))
+            self._conn = conn
+        return self._conn
+
+    def sync(self, force: bool = False) -> None:
+        if not self.available:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                conn = self._writer()
+                data_version = conn.execute("PRAGMA msgs.data_version").fetchone()[0]
+                if data_version == self._data_version and not force:
+                    return
+                with conn:
+                    for statement in SYNC_STATEMENTS:
+                        conn.execute(statement)
+                self._data_version = data_version
+            except sqlite3.Error as e:
+                if isinstance(e, sqlite3.OperationalError) and any(error in str(e) for error in STRUCTURAL_ERRORS):
+                    # Callers fall back to LIKE matching on chats
+                    print(f"Contact index disabled: {e}")
+                    self.available = False
+                else:
+                    print(f"Contact index sync failed, retrying on the next check: {e}")
+
+    def attach(self, conn: sqlite3.Connection) -> bool:
+        """Bring the index up to date and attach it as schema ``contacts`` to a reader connection."""
+        self.sync()
+        if not self.available or self._data_version is None:
+            # Disabled, or not built yet because the first sync failed
+            return False
+
+        attached = any(row[1] == "contacts" for row in conn.execute("PRAGMA database_list"))
+        if not attached:
+            conn.execute("ATTACH DATABASE ? AS contacts", (f"file:{self.path}?mode=ro",))
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+contact_index = ContactIndex()
@@ -0,0 +1,105 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .config import (
+    MESSAGES_DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_BUSY_TIMEOUT,
+    DB_MMAP_SIZE,
+    DB_CACHED_STATEMENTS
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of read-only connections to the bridge's messages.db.
+
+    Connections are opened lazily, kept open between tool calls so the page
+    cache and mmap stay warm, and reuse sqlite3's per-connection prepared
+    statement cache. If every pooled connection is busy for longer than
+    ``timeout`` seconds an overflow connection is handed out and closed on
+    release, so nested lookups can never deadlock the pool.
+    """
+
+    def __init__(self, path: str = MESSAGES_DB_PATH, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._overflow = set()
+        self._lock = threading.Lock()
+        # Optional callback receiving every SQL statement run on new connections
+        self.trace = None
+
+    def open_connection(self) -> sqlite3.Connection:
+        """Open a new read-only connection with the pool's settings (not tracked by the pool)."""
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro",
+            uri=True,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=DB_CACHED_STATEMENTS
+        )
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA query_only = ON")
+        if self.trace is not None:
+            conn.set_trace_callback(self.trace)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                conn = self.open_connection()
+                self._created += 1
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            conn = self.open_connection()
+            with self._lock:
+                self._overflow.add(id(conn))
+            return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            is_overflow = id(conn) in self._overflow
+            self._overflow.discard(id(conn))
+
+        if is_overflow:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close all idle connections, e.g. on server shutdown."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+pool = ConnectionPool()
@@ -3,6 +3,7 @@ from fastmcp import FastMCP
 from .whatsapp import (
     search_contacts as whatsapp_search_contacts,
     list_messages as whatsapp_list_messages,
+    search_messages as whatsapp_search_messages,
     list_chats as whatsapp_list_chats,
     get_chat as whatsapp_get_chat,
     get_direct_chat_by_contact as whatsapp_get_direct_chat_by_contact,
@@ -10,14 +11,27 @@ from .whatsapp import (
     get_last_interaction as whatsapp_get_last_interaction,
     get_message_context as whatsapp_get_message_context,
     send_message as whatsapp_send_message,
+    send_messages as whatsapp_send_messages,
     send_file as whatsapp_send_file,
     send_audio_message as whatsapp_audio_voice_message,
     download_media as whatsapp_download_media
 )
+from .db import pool
+from .search import search_index
+from .contacts import contact_index
+from .audio import transcode_cache
+from .media import media_cache
+from .migrations import migrate_database
+from .config import RESULT_PAGE_CHARS, RESULT_PAGE_LIMITS
+from ..results import ResultPager
 
 # Initialize FastMCP server
 mcp = FastMCP("whatsapp")
 
+# Long message listings are returned a page at a time; the rest is read via whatsapp_read_result_page
+results = ResultPager("whatsapp_read_result_page", RESULT_PAGE_CHARS, RESULT_PAGE_LIMITS)
+results.register(mcp)
+
 @mcp.tool()
 def search_contacts(query: str) -> List[Dict[str, Any]]:
     """Search WhatsApp contacts by name or phone number.
@@ -39,8 +53,9 @@ def list_messages(
     page: int = 0,
     include_context: bool = True,
     context_before: int = 1,
-    context_after: int = 1
-) -> List[Dict[str, Any]]:
+    context_after: int = 1,
+    cursor: Optional[str] = None
+) -> str:
     """Get WhatsApp messages matching specified criteria with optional context.
     
     Args:
@@ -48,12 +63,13 @@ def list_messages(
         before: Optional ISO-8601 formatted string to only return messages before this date
         sender_phone_number: Optional phone number to filter messages by sender
         chat_jid: Optional chat JID to filter messages by chat
-        query: Optional search term to filter messages by content
+        query: Optional full-text search over content, sender and chat name; supports "quoted phrases" and prefix* terms
         limit: Maximum number of messages to return (default 20)
-        page: Page number for pagination (default 0)
+        page: Page number for pagination, used only without a cursor (default 0)
         include_context: Whether to include messages before and after matches (default True)
         context_before: Number of messages to include before each match (default 1)
         context_after: Number of messages to include after each match (default 1)
+        cursor: Optional next_cursor value from the previous page to continue from
     """
     messages = whatsapp_list_messages(
         after=after,
@@ -65,9 +81,39 @@ def list_messages(
         page=page,
         include_context=include_context,
         context_before=context_before,
-        context_after=context_after
+        context_after=context_after,
+        cursor=cursor
+    )
+    return results.shape_text("list_messages", messages)
+
+@mcp.tool()
+def search_messages(
+    query: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    sender_phone_number: Optional[str] = None,
+    chat_jid: Optional[str] = None,
+    limit: int = 20
+) -> str:
+    """Full-text search WhatsApp messages by content, sender or chat name, best matches first.
+    
+    Args:
+        query: Search terms; all words must match. Use "quoted phrases" for exact phrases and a trailing * for prefixes (e.g. meet*)
+        after: Optional ISO-8601 formatted string to only return messages after this date
+        before: Optional ISO-8601 formatted string to only return messages before this date
+        sender_phone_number: Optional phone number to filter messages by sender
+        chat_jid: Optional chat JID to filter messages by chat
+        limit: Maximum number of messages to return (default 20)
+    """
+    messages = whatsapp_search_messages(
+        query=query,
+        after=after,
+        before=before,
+        sender_phone_number=sender_phone_number,
+        chat_jid=chat_jid,
+        limit=limit
     )
-    return messages
+    return results.shape_text("search_messages", messages)
 
 @mcp.tool()
 def list_chats(
@@ -75,23 +121,29 @@ def list_chats(
     limit: int = 20,
     page: int = 0,
     include_last_message: bool = True,
-    sort_by: str = "last_active"
-) -> List[Dict[str, Any]]:
+    sort_by: str = "last_active",
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
     """Get WhatsApp chats matching specified criteria.
     
     Args:
         query: Optional search term to filter chats by name or JID
         limit: Maximum number of chats to return (default 20)
-        page: Page number for pagination (default 0)
+        page: Page number for pagination, used only without a cursor (default 0)
         include_last_message: Whether to include the last message in each chat (default True)
         sort_by: Field to sort results by, either "last_active" or "name" (default "last_active")
+        cursor: Optional next_cursor value from the previous page to continue from
+    
+    Returns:
+        A dictionary with the "chats" and a "next_cursor" (null on the last page)
     """
     chats = whatsapp_list_chats(
         query=query,
         limit=limit,
         page=page,
         include_last_message=include_last_message,
-        sort_by=sort_by
+        sort_by=sort_by,
+        cursor=cursor
     )
     return chats
 
@@ -117,15 +169,19 @@ def get_direct_chat_by_contact(sender_phone_number: str) -> Dict[str, Any]:
     return chat
 
 @mcp.tool()
-def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Dict[str, Any]]:
+def get_contact_chats(jid: str, limit: int = 20, page: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
     """Get all WhatsApp chats involving the contact.
     
     Args:
         jid: The contact's JID to search for
         limit: Maximum number of chats to return (default 20)
-        page: Page number for pagination (default 0)
+        page: Page number for pagination, used only without a cursor (default 0)
+        cursor: Optional next_cursor value from the previous page to continue from
+    
+    Returns:
+        A dictionary with the "chats" and a "next_cursor" (null on the last page)
     """
-    chats = whatsapp_get_contact_chats(jid, limit, page)
+    chats = whatsapp_get_contact_chats(jid, limit, page, cursor)
     return chats
 
 @mcp.tool()
@@ -155,7 +211,7 @@ def get_message_context(
     return context
 
 @mcp.tool()
-def send_message(
+async def send_message(
     recipient: str,
     message: str
 ) -> Dict[str, Any]:
@@ -177,14 +233,44 @@ def send_message(
         }
     
     # Call the whatsapp_send_message function with the unified recipient parameter
-    success, status_message = whatsapp_send_message(recipient, message)
+    success, status_message = await whatsapp_send_message(recipient, message)
     return {
         "success": success,
         "message": status_message
     }
 
 @mcp.tool()
-def send_file(recipient: str, media_path: str) -> Dict[str, Any]:
+async def send_messages(recipients: List[str], message: str) -> Dict[str, Any]:
+    """Send the same WhatsApp message to several people or groups at once. For group chats use the JID.
+
+    Args:
+        recipients: The recipients - each either a phone number with country code but no + or other symbols,
+                 or a JID (e.g., "123456789@s.whatsapp.net" or a group JID like "123456789@g.us")
+        message: The message text to send
+    
+    Returns:
+        A dictionary with the number of messages sent and failed, and a result per recipient
+    """
+    if not recipients:
+        return {
+            "success": False,
+            "message": "At least one recipient must be provided"
+        }
+    
+    outcomes = await whatsapp_send_messages(recipients, message)
+    sent = sum(1 for _, success, _ in outcomes if success)
+    return {
+        "success": sent == len(outcomes),
+        "sent": sent,
+        "failed": len(outcomes) - sent,
+        "results": [
+            {"recipient": recipient, "success": success, "message": status_message}
+            for recipient, success, status_message in outcomes
+        ]
+    }
+
+@mcp.tool()
+async def send_file(recipient: str, media_path: str) -> Dict[str, Any]:
     """Send a file such as a picture, raw audio, video or document via WhatsApp to the specified recipient. For group messages use the JID.
     
     Args:
@@ -197,14 +283,14 @@ def send_file(recipient: str, media_path: str) -> Dict[str, Any]:
     """
     
     # Call the whatsapp_send_file function
-    success, status_message = whatsapp_send_file(recipient, media_path)
+    success, status_message = await whatsapp_send_file(recipient, media_path)
     return {
         "success": success,
         "message": status_message
     }
 
 @mcp.tool()
-def send_audio_message(recipient: str, media_path: str) -> Dict[str, Any]:
+async def send_audio_message(recipient: str, media_path: str) -> Dict[str, Any]:
     """Send any audio file as a WhatsApp audio message to the specified recipient. For group messages use the JID. If it errors due to ffmpeg not being installed, use send_file instead.
     
     Args:
@@ -215,14 +301,14 @@ def send_audio_message(recipient: str, media_path: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing success status and a status message
     """
-    success, status_message = whatsapp_audio_voice_message(recipient, media_path)
+    success, status_message = await whatsapp_audio_voice_message(recipient, media_path)
     return {
         "success": success,
         "message": status_message
     }
 
 @mcp.tool()
-def download_media(message_id: str, chat_jid: str) -> Dict[str, Any]:
+async def download_media(message_id: str, chat_jid: str) -> Dict[str, Any]:
     """Download media from a WhatsApp message and get the local file path.
     
     Args:
@@ -232,7 +318,7 @@ def download_media(message_id: str, chat_jid: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing success status, a status message, and the file path if successful
     """
-    file_path = whatsapp_download_media(message_id, chat_jid)
+    file_path = await whatsapp_download_media(message_id, chat_jid)
     
     if file_path:
         return {
@@ -247,5 +333,18 @@ def download_media(message_id: str, chat_jid: str) -> Dict[str, Any]:
         }
 
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport="http", port=8002)
\ No newline at end of file
+    # Indexes and WAL mode are set up here, once, so tool connections stay read-only
+    migrate_database()
+
+    # Build/refresh the full-text index in the background while serving
+    search_index.start_background_sync()
+
+    # Initialize and run the server; all tools share the pooled messages.db connections
+    try:
+        mcp.run(transport="http", port=8002)
+    finally:
+        search_index.close()
+        contact_index.close()
+        transcode_cache.close()
+        media_cache.close()
+        pool.close()
\ No newline at end of file
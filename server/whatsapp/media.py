@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from .config import MEDIA_CACHE_DB_PATH, MEDIA_CACHE_MAX_BYTES, DB_BUSY_TIMEOUT
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS media (
+        message_id TEXT NOT NULL,
+        chat_jid TEXT NOT NULL,
+        path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        last_access REAL NOT NULL,
+        PRIMARY KEY (message_id, chat_jid)
+    );
+
+    CREATE INDEX IF NOT EXISTS media_last_access ON media (last_access);
+"""
+
+
+def _file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    """Index of media files the bridge has downloaded, with an LRU disk quota.
+
+    A hit is a row whose file still exists with the recorded size; it is
+    served without calling the bridge. Concurrent requests for the same
+    ``(message_id, chat_jid)`` share one download. When the indexed files
+    exceed ``max_bytes`` the least recently accessed ones are deleted; the
+    bridge downloads them again if they are ever requested.
+    """
+
+    def __init__(self, path: str = MEDIA_CACHE_DB_PATH, max_bytes: int = MEDIA_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, message_id: str, chat_jid: str) -> Optional[str]:
+        """Return the cached file path, or None if it was never downloaded or is gone."""
+        with self._lock:
+            conn = self._db()
+            row = conn.execute("""
+                SELECT path, size FROM media WHERE message_id = ? AND chat_jid = ?
+            """, (message_id, chat_jid)).fetchone()
+            if row is None:
+                return None
+
+            path, size = row
+            with conn:
+                if os.path.isfile(path) and os.path.getsize(path) == size:
+                    conn.execute("""
+                        UPDATE media SET last_access = ? WHERE message_id = ? AND chat_jid = ?
+                    """, (time.time(), message_id, chat_jid))
+                    return path
+
+                # Deleted or replaced behind our back
+                conn.execute("DELETE FROM media WHERE message_id = ? AND chat_jid = ?", (message_id, chat_jid))
+                return None
+
+    def record(self, message_id: str, chat_jid: str, path: str) -> None:
+        """Index a freshly downloaded file and enforce the disk quota."""
+        size = os.path.getsize(path)
+        sha256 = _file_digest(path)
+
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO media (message_id, chat_jid, path, size, sha256, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (message_id, chat_jid, path, size, sha256, time.time()))
+
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM media").fetchone()[0]
+                if total <= self.max_bytes:
+                    return
+
+                rows = conn.execute("""
+                    SELECT message_id, chat_jid, path, size, sha256
+                    FROM media
+                    WHERE NOT (message_id = ? AND chat_jid = ?)
+                    ORDER BY last_access
+                """, (message_id, chat_jid)).fetchall()
+
+                for old_message_id, old_chat_jid, old_path, old_size, old_sha256 in rows:
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM media WHERE message_id = ? AND chat_jid = ?", (old_message_id, old_chat_jid))
+                    total -= old_size
+                    # The bridge names files per chat, so another row may point at the same file
+                    shared = conn.execute("SELECT 1 FROM media WHERE path = ? LIMIT 1", (old_path,)).fetchone()
+                    if not shared:
+                        try:
+                            os.unlink(old_path)
+                        except OSError:
+                            pass
+
+    async def get(self, message_id: str, chat_jid: str, download: Callable[[str, str], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Return the media's local path, calling ``download`` only on a cache miss."""
+        path = self.lookup(message_id, chat_jid)
+        if path:
+            self.hits += 1
+            return path
+
+        key = (message_id, chat_jid)
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            path = await download(message_id, chat_jid)
+            if path and os.path.isfile(path):
+                await asyncio.to_thread(self.record, message_id, chat_jid, path)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters have the exception; don't warn about it being unretrieved
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+media_cache = MediaCache()
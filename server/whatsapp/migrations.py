@@ -0,0 +1,172 @@
+"""Indexes the MCP server adds to the bridge's messages.db, and a query-plan audit.
+
+The server applies the migrations once at startup; tool connections are
+read-only and never run DDL. Run ``python -m server.whatsapp.migrations`` to
+apply them by hand, or ``python -m server.whatsapp.migrations --check`` to
+also run every read tool against messages.db and fail if any of their
+queries scans the messages table.
+"""
+import os
+import re
+import sqlite3
+import sys
+
+from .config import MESSAGES_DB_PATH, DB_BUSY_TIMEOUT
+
+# The bridge creates the tables; we only add indexes, so every step is idempotent.
+# Expression indexes must use exactly the expressions the queries sort on.
+MIGRATIONS = [
+    # Per-chat history, context windows and the chats -> last message join
+    "CREATE INDEX IF NOT EXISTS idx_messages_chat_time ON messages (chat_jid, timestamp, id)",
+    # Global listing ordered by (timestamp, id), which is also the keyset cursor
+    "CREATE INDEX IF NOT EXISTS idx_messages_time ON messages (timestamp, id)",
+    # Sender filters, last interaction and the chats a contact wrote in
+    "CREATE INDEX IF NOT EXISTS idx_messages_sender_time ON messages (sender, timestamp, chat_jid)",
+    # list_chats / get_contact_chats ordering and keyset cursors
+    "CREATE INDEX IF NOT EXISTS idx_chats_last_active ON chats (COALESCE(last_message_time, ''), jid)",
+    "CREATE INDEX IF NOT EXISTS idx_chats_name ON chats (COALESCE(name, ''), jid)",
+]
+
+# Any scan of the messages table (or its aliases), even along an index, or of the contact index
+_MESSAGES_SCAN = re.compile(r"^SCAN (messages|m|s|k)\b")
+# An ordered walk of the time index is fine where a LIMIT stops it early
+_ORDERED_SCAN = re.compile(r"^SCAN (messages|m) USING (COVERING )?INDEX idx_messages_time\b")
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Apply all migrations on a writable connection and refresh planner statistics."""
+    with conn:
+        for statement in MIGRATIONS:
+            conn.execute(statement)
+    conn.execute("PRAGMA optimize")
+
+
+def migrate_database(path: str = MESSAGES_DB_PATH) -> bool:
+    """Switch ``path`` to WAL and apply the migrations from a short-lived writable connection.
+
+    journal_mode and indexes are stored in the database file but can only be
+    changed from a writable connection; WAL lets our readers run alongside
+    the bridge. Returns False if the database is missing or could not be migrated.
+    """
+    if not os.path.exists(path):
+        print(f"{path} does not exist yet; start the bridge first to apply the migrations")
+        return False
+    try:
+        conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            migrate(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Could not migrate {path} (WAL mode, indexes): {e}")
+        return False
+    return True
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> list:
+    """Return the EXPLAIN QUERY PLAN detail lines of ``sql``."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def full_scans(plan: list, allow_ordered_scan: bool = False) -> list:
+    return [
+        detail for detail in plan
+        if _MESSAGES_SCAN.match(detail) and not (allow_ordered_scan and _ORDERED_SCAN.match(detail))
+    ]
+
+
+def _sample_arguments(conn: sqlite3.Connection) -> dict:
+    row = conn.execute("""
+        SELECT id, chat_jid, sender, timestamp FROM messages
+        WHERE sender IS NOT NULL AND sender != ''
+        ORDER BY rowid DESC LIMIT 1
+    """).fetchone()
+    if row is None:
+        raise SystemExit("messages.db has no messages to audit against")
+    message_id, chat_jid, sender, timestamp = row
+    return {"message_id": message_id, "chat_jid": chat_jid, "sender": sender, "timestamp": timestamp}
+
+
+def _tool_calls(args: dict) -> list:
+    """(label, call, allow_ordered_scan) for every read tool query shape."""
+    from . import whatsapp
+
+    return [
+        # Unfiltered listing walks the time index newest first and stops at the LIMIT
+        ("list_messages", lambda: whatsapp.list_messages(limit=5), True),
+        ("list_messages chat", lambda: whatsapp.list_messages(chat_jid=args["chat_jid"], limit=5), False),
+        ("list_messages sender", lambda: whatsapp.list_messages(sender_phone_number=args["sender"], before=args["timestamp"], limit=5), False),
+        ("list_messages query", lambda: whatsapp.list_messages(query="hello", limit=5), False),
+        ("search_messages", lambda: whatsapp.search_messages("hello", limit=5), False),
+        ("get_message_context", lambda: whatsapp.get_message_context(args["message_id"]), False),
+        ("list_chats", lambda: whatsapp.list_chats(limit=5), False),
+        ("list_chats name", lambda: whatsapp.list_chats(limit=5, sort_by="name"), False),
+        ("get_chat", lambda: whatsapp.get_chat(args["chat_jid"]), False),
+        ("get_contact_chats", lambda: whatsapp.get_contact_chats(args["sender"], limit=5), False),
+        ("get_last_interaction", lambda: whatsapp.get_last_interaction(args["sender"]), False),
+        ("get_direct_chat_by_contact", lambda: whatsapp.get_direct_chat_by_contact(args["sender"]), False),
+        ("get_direct_chat_by_contact suffix", lambda: whatsapp.get_direct_chat_by_contact(args["sender"][-8:]), False),
+        ("search_contacts", lambda: whatsapp.search_contacts(args["sender"][:4]), False),
+        ("search_contacts name", lambda: whatsapp.search_contacts("person"), False),
+    ]
+
+
+def check_query_plans() -> int:
+    """Run the read tools with SQL tracing and report queries that scan messages.
+
+    Returns the number of offending statements.
+    """
+    from .db import pool
+    from .search import search_index
+    from .contacts import contact_index
+
+    # Build the full-text index first so text queries take the FTS path
+    search_index.sync(force=True, wait=True)
+
+    conn = pool.open_connection()
+    args = _sample_arguments(conn)
+
+    search_index.attach(conn)
+    contact_index.attach(conn)
+    failures = 0
+    checked = 0
+    for label, call, allow_ordered_scan in _tool_calls(args):
+        statements = []
+        # The trace callback is installed when a connection opens, so start from fresh ones
+        pool.close()
+        pool.trace = statements.append
+        try:
+            call()
+        finally:
+            pool.trace = None
+
+        for sql in dict.fromkeys(statements):
+            if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                continue
+            checked += 1
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error as e:
+                # e.g. the FTS index is not attached on this connection
+                print(f"SKIP {label} ({e}): {' '.join(sql.split())[:120]}")
+                continue
+
+            if full_scans(plan, allow_ordered_scan):
+                failures += 1
+                print(f"SCAN in {label}: {' '.join(sql.split())[:200]}")
+                for detail in plan:
+                    print(f"    {detail}")
+
+    conn.close()
+    print(f"Checked {checked} statements, {failures} scanning messages")
+    return failures
+
+
+if __name__ == "__main__":
+    if not migrate_database():
+        sys.exit(1)
+    print(f"Migrated {MESSAGES_DB_PATH}")
+
+    if "--check" in sys.argv[1:]:
+        sys.exit(1 if check_query_plans() else 0)
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from .config import SENDER_NAME_CACHE_SIZE, SENDER_NAME_CHECK_INTERVAL
+from .contacts import contact_index, jid_digits, normalize_phone, phone_match
+from .db import pool
+
+USER_SERVER = "@s.whatsapp.net"
+
+
+def _cache_key(jid: str) -> str:
+    # The bridge stores senders as bare numbers but chats under full user JIDs
+    # (possibly with a device suffix), so both are keyed by their digits
+    if jid and ("@" not in jid or jid.endswith(USER_SERVER)):
+        return jid_digits(jid) or jid
+    return jid
+
+
+def _chat_jid(key: str) -> str:
+    return key + USER_SERVER if key.isdigit() else key
+
+
+class SenderNameCache:
+    """Bounded LRU cache of sender JID -> display name.
+
+    Entries are keyed by the sender's phone digits (other JIDs as they are),
+    so bare ``messages.sender`` numbers hit the names of their chats. The
+    cache is bulk-loaded from the most recently active rows of ``chats``.
+    At most every ``check_interval`` seconds it asks SQLite whether another
+    connection (the bridge) committed anything; if so it re-hashes the
+    ``(jid, name)`` pairs and drops every cached entry when a name changed
+    or a chat was added, so renames show up without polling per message.
+    """
+
+    def __init__(self, maxsize: int = SENDER_NAME_CACHE_SIZE, check_interval: float = SENDER_NAME_CHECK_INTERVAL):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._names = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._data_version = None
+        self._names_hash = None
+        self._checked_at = 0.0
+
+    def _put(self, jid: str, name: str) -> None:
+        self._names[jid] = name
+        self._names.move_to_end(jid)
+        while len(self._names) > self.maxsize:
+            self._names.popitem(last=False)
+
+    def _revalidate(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        if self._conn is None:
+            self._conn = pool.open_connection()
+
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        rows = self._conn.execute("""
+            SELECT jid, name
+            FROM chats
+            ORDER BY last_message_time DESC
+        """).fetchall()
+        names_hash = hashlib.sha256(json.dumps(sorted(rows)).encode()).hexdigest()
+        if names_hash == self._names_hash:
+            return
+        self._names_hash = names_hash
+
+        # Names changed (or first load): rebuild from the most active chats,
+        # least active first so the most active end up most recently used
+        self._names.clear()
+        for jid, name in reversed(rows[:self.maxsize]):
+            if name:
+                self._put(_cache_key(jid), name)
+
+    def _lookup(self, cursor: sqlite3.Cursor, sender_jid: str) -> Optional[str]:
+        # First try matching by exact JID
+        cursor.execute("""
+            SELECT name
+            FROM chats
+            WHERE jid = ?
+            LIMIT 1
+        """, (_chat_jid(_cache_key(sender_jid)),))
+
+        result = cursor.fetchone()
+
+        # If no result, match the number against the normalized contact index
+        if not result:
+            match = phone_match(sender_jid)
+            if match and contact_index.attach(cursor.connection):
+                clause, params = match
+                cursor.execute(f"""
+                    SELECT k.name
+                    FROM contacts.contacts k
+                    WHERE {clause} AND NOT k.is_group AND k.name IS NOT NULL AND k.name != ''
+                    ORDER BY k.digits = ? DESC
+                    LIMIT 1
+                """, (*params, normalize_phone(sender_jid)))
+
+                result = cursor.fetchone()
+
+        return result[0] if result and result[0] else None
+
+    def get(self, sender_jid: str) -> str:
+        """Return the display name for a sender, or the JID itself if unknown."""
+        key = _cache_key(sender_jid)
+        with self._lock:
+            try:
+                self._revalidate()
+            except sqlite3.Error as e:
+                print(f"Database error while refreshing sender names: {e}")
+
+            if key in self._names:
+                self.hits += 1
+                self._names.move_to_end(key)
+                name = self._names[key]
+                # Unknown senders are cached under their own ID; keep showing the one asked for
+                return sender_jid if name == key else name
+            self.misses += 1
+
+        try:
+            with pool.connection() as conn:
+                name = self._lookup(conn.cursor(), sender_jid)
+        except sqlite3.Error as e:
+            print(f"Database error while getting sender name: {e}")
+            return sender_jid
+
+        with self._lock:
+            self._put(key, name or key)
+        return name or sender_jid
+
+    def prefetch(self, sender_jids: Iterable[str]) -> None:
+        """Resolve many senders up front with one query for the exact-JID misses."""
+        with self._lock:
+            try:
+                self._revalidate()
+            except sqlite3.Error as e:
+                print(f"Database error while refreshing sender names: {e}")
+                return
+            missing = sorted({_cache_key(jid) for jid in sender_jids if jid} - self._names.keys())
+
+        if not missing:
+            return
+
+        try:
+            with pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT jid, name
+                    FROM chats
+                    WHERE jid IN (SELECT value FROM json_each(?)) AND name IS NOT NULL AND name != ''
+                """, (json.dumps([_chat_jid(key) for key in missing]),)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error while prefetching sender names: {e}")
+            return
+
+        with self._lock:
+            for jid, name in rows:
+                self._put(_cache_key(jid), name)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._names.clear()
+            self._data_version = None
+            self._names_hash = None
+            self._checked_at = 0.0
+
+
+sender_names = SenderNameCache()
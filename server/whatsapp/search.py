@@ -0,0 +1,212 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .config import (
+    MESSAGES_DB_PATH,
+    SEARCH_DB_PATH,
+    SEARCH_SYNC_INTERVAL,
+    SEARCH_SYNC_BATCH_SIZE,
+    DB_BUSY_TIMEOUT
+)
+
+SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content,
+        sender,
+        chat_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    );
+
+    -- Maps an indexed messages.rowid back to the message's primary key so a
+    -- row the bridge re-inserts (INSERT OR REPLACE gives it a new rowid)
+    -- replaces its old index entry instead of duplicating it.
+    CREATE TABLE IF NOT EXISTS indexed_messages (
+        rowid INTEGER PRIMARY KEY,
+        message_id TEXT NOT NULL,
+        chat_jid TEXT NOT NULL,
+        UNIQUE (message_id, chat_jid)
+    );
+
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value INTEGER
+    );
+"""
+
+NEW_MESSAGES_QUERY = """
+    SELECT
+        m.rowid,
+        m.id,
+        m.chat_jid,
+        COALESCE(m.content, ''),
+        COALESCE(m.sender, '') || ' ' || COALESCE(s.name, ''),
+        COALESCE(c.name, '')
+    FROM msgs.messages m
+    LEFT JOIN msgs.chats c ON c.jid = m.chat_jid
+    LEFT JOIN msgs.chats s ON s.jid = m.sender || '@s.whatsapp.net'
+    WHERE m.rowid > ?
+    ORDER BY m.rowid
+    LIMIT ?
+"""
+
+_TOKEN_PATTERN = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def to_match_expression(query: str) -> Optional[str]:
+    """Turn a user query into a safe FTS5 MATCH expression.
+
+    Quoted text is kept as a phrase, a trailing ``*`` makes a word or phrase a
+    prefix query, and everything else is matched as individual terms that
+    must all appear. Punctuation cannot produce FTS5 syntax errors.
+    """
+    terms = []
+    for phrase, phrase_star, word in _TOKEN_PATTERN.findall(query):
+        if word:
+            prefix = word.endswith("*")
+            text = word.rstrip("*")
+        else:
+            prefix = bool(phrase_star)
+            text = phrase
+        text = text.strip()
+        if not text:
+            continue
+        terms.append('"' + text.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms) if terms else None
+
+
+class SearchIndex:
+    """Sidecar FTS5 index over messages.db, kept in its own database file.
+
+    The bridge owns messages.db, so the index lives next to it in search.db
+    and is filled incrementally from a ``messages.rowid`` high-water mark.
+    Readers attach search.db to their pooled read-only connections.
+    """
+
+    def __init__(self, path: str = SEARCH_DB_PATH, source_path: str = MESSAGES_DB_PATH):
+        self.path = path
+        self.source_path = source_path
+        self.available = True
+        self.ready = False
+        self._conn = None
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, uri=True, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.execute("ATTACH DATABASE ? AS msgs", (f"file:{self.source_path}?mode=ro",))
+            self._conn = conn
+        return self._conn
+
+    def sync(self, force: bool = False, wait: bool = False) -> int:
+        """Index messages added since the last sync and return how many were indexed.
+
+        Calls within ``SEARCH_SYNC_INTERVAL`` of the previous sync are skipped
+        unless ``force`` is set. If another thread is already syncing, the call
+        returns immediately unless ``wait`` is set.
+        """
+        if not self.available:
+            return 0
+        if not force and time.monotonic() - self._synced_at < SEARCH_SYNC_INTERVAL:
+            return 0
+        if not self._lock.acquire(blocking=wait):
+            return 0
+
+        try:
+            conn = self._writer()
+            row = conn.execute("SELECT value FROM sync_state WHERE key = 'last_rowid'").fetchone()
+            last_rowid = row[0] if row else 0
+            indexed = 0
+
+            while True:
+                rows = conn.execute(NEW_MESSAGES_QUERY, (last_rowid, SEARCH_SYNC_BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+
+                with conn:
+                    for rowid, message_id, chat_jid, content, sender, chat_name in rows:
+                        old = conn.execute("""
+                            SELECT rowid FROM indexed_messages WHERE message_id = ? AND chat_jid = ?
+                        """, (message_id, chat_jid)).fetchone()
+                        if old:
+                            conn.execute("DELETE FROM messages_fts WHERE rowid = ?", old)
+                            conn.execute("DELETE FROM indexed_messages WHERE rowid = ?", old)
+
+                        conn.execute("""
+                            INSERT INTO indexed_messages (rowid, message_id, chat_jid) VALUES (?, ?, ?)
+                        """, (rowid, message_id, chat_jid))
+                        conn.execute("""
+                            INSERT INTO messages_fts (rowid, content, sender, chat_name) VALUES (?, ?, ?, ?)
+                        """, (rowid, content, sender, chat_name))
+
+                    last_rowid = rows[-1][0]
+                    conn.execute("""
+                        INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_rowid', ?)
+                    """, (last_rowid,))
+                indexed += len(rows)
+
+            self.ready = True
+            self._synced_at = time.monotonic()
+            return indexed
+        except sqlite3.OperationalError as e:
+            if "fts5" in str(e):
+                # SQLite was built without FTS5; callers fall back to LIKE
+                self.available = False
+            print(f"Search index sync failed: {e}")
+            return 0
+        except sqlite3.Error as e:
+            print(f"Search index sync failed: {e}")
+            return 0
+        finally:
+            self._lock.release()
+
+    def attach(self, conn: sqlite3.Connection) -> bool:
+        """Bring the index up to date and attach it as schema ``search`` to a reader connection.
+
+        Returns False while the index is unavailable or still being built; the
+        first build always runs on the background thread, never in a tool call.
+        """
+        if not self.available:
+            return False
+        if not self.ready:
+            self.start_background_sync()
+            return False
+
+        self.sync()
+        attached = any(row[1] == "search" for row in conn.execute("PRAGMA database_list"))
+        if not attached:
+            conn.execute("ATTACH DATABASE ? AS search", (f"file:{self.path}?mode=ro",))
+        return True
+
+    def _sync_loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self.sync(force=True, wait=True)
+            self._stop.wait(interval)
+
+    def start_background_sync(self, interval: float = SEARCH_SYNC_INTERVAL) -> None:
+        """Build the index and keep it current from a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sync_loop, args=(interval,), daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+search_index = SearchIndex()
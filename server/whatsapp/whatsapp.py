@@ -1,11 +1,20 @@
+import os
+import base64
+import asyncio
 import sqlite3
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional, List, Tuple
-import requests
+import httpx
 import json
 from . import audio
-from .config import MESSAGES_DB_PATH, WHATSAPP_API_BASE_URL
+from .config import SEND_BATCH_CONCURRENCY
+from .bridge import bridge
+from .contacts import contact_index, normalize_phone, phone_match
+from .media import media_cache
+from .db import pool
+from .names import sender_names
+from .search import search_index, to_match_expression
 
 @dataclass
 class Message:
@@ -44,49 +53,30 @@ class MessageContext:
     before: List[Message]
     after: List[Message]
 
-def get_sender_name(sender_jid: str) -> str:
+@dataclass
+class ChatPage:
+    chats: List[Chat]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(kind: str, *key) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor string."""
+    raw = json.dumps([kind, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, kind: str) -> list:
+    """Decode a cursor produced by encode_cursor for the same kind of listing."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
-        cursor = conn.cursor()
-        
-        # First try matching by exact JID
-        cursor.execute("""
-            SELECT name
-            FROM chats
-            WHERE jid = ?
-            LIMIT 1
-        """, (sender_jid,))
-        
-        result = cursor.fetchone()
-        
-        # If no result, try looking for the number within JIDs
-        if not result:
-            # Extract the phone number part if it's a JID
-            if '@' in sender_jid:
-                phone_part = sender_jid.split('@')[0]
-            else:
-                phone_part = sender_jid
-                
-            cursor.execute("""
-                SELECT name
-                FROM chats
-                WHERE jid LIKE ?
-                LIMIT 1
-            """, (f"%{phone_part}%",))
-            
-            result = cursor.fetchone()
-        
-        if result and result[0]:
-            return result[0]
-        else:
-            return sender_jid
-        
-    except sqlite3.Error as e:
-        print(f"Database error while getting sender name: {e}")
-        return sender_jid
-    finally:
-        if 'conn' in locals():
-            conn.close()
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    if not isinstance(data, list) or len(data) < 2 or data[0] != kind:
+        raise ValueError(f"Cursor does not belong to this listing: {cursor}")
+    return data[1:]
+
+def get_sender_name(sender_jid: str) -> str:
+    """Resolve a sender JID to a display name through the shared in-process cache."""
+    return sender_names.get(sender_jid)
 
 def format_message(message: Message, show_chat_info: bool = True) -> None:
     """Print a single message with consistent formatting."""
@@ -114,10 +104,51 @@ def format_messages_list(messages: List[Message], show_chat_info: bool = True) -
         output += "No messages to display."
         return output
     
+    # Resolve every distinct sender up front instead of one lookup per message
+    sender_names.prefetch(message.sender for message in messages if not message.is_from_me)
+
     for message in messages:
         output += format_message(message, show_chat_info)
     return output
 
+def _message_filters(
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    sender_phone_number: Optional[str] = None,
+    chat_jid: Optional[str] = None
+) -> Tuple[List[str], list]:
+    """Build the WHERE clauses and parameters shared by the message listing queries."""
+    where_clauses = []
+    params = []
+
+    if after:
+        try:
+            after = datetime.fromisoformat(after)
+        except ValueError:
+            raise ValueError(f"Invalid date format for 'after': {after}. Please use ISO-8601 format.")
+
+        where_clauses.append("messages.timestamp > ?")
+        params.append(after)
+
+    if before:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            raise ValueError(f"Invalid date format for 'before': {before}. Please use ISO-8601 format.")
+
+        where_clauses.append("messages.timestamp < ?")
+        params.append(before)
+
+    if sender_phone_number:
+        where_clauses.append("messages.sender = ?")
+        params.append(sender_phone_number)
+
+    if chat_jid:
+        where_clauses.append("messages.chat_jid = ?")
+        params.append(chat_jid)
+
+    return where_clauses, params
+
 def list_messages(
     after: Optional[str] = None,
     before: Optional[str] = None,
@@ -128,62 +159,57 @@ def list_messages(
     page: int = 0,
     include_context: bool = True,
     context_before: int = 1,
-    context_after: int = 1
+    context_after: int = 1,
+    cursor: Optional[str] = None
 ) -> List[Message]:
-    """Get messages matching the specified criteria with optional context."""
+    """Get messages matching the specified criteria with optional context.
+
+    Pass the ``next_cursor`` from a previous page as ``cursor`` to continue after
+    its last message; ``page`` is only used when no cursor is given.
+    """
+    # Validate before taking a connection, the name `cursor` is reused below
+    page_key = decode_cursor(cursor, "messages") if cursor else None
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
         # Build base query
         query_parts = ["SELECT messages.timestamp, messages.sender, chats.name, messages.content, messages.is_from_me, chats.jid, messages.id, messages.media_type FROM messages"]
         query_parts.append("JOIN chats ON messages.chat_jid = chats.jid")
-        where_clauses = []
-        params = []
-        
-        # Add filters
-        if after:
-            try:
-                after = datetime.fromisoformat(after)
-            except ValueError:
-                raise ValueError(f"Invalid date format for 'after': {after}. Please use ISO-8601 format.")
-            
-            where_clauses.append("messages.timestamp > ?")
-            params.append(after)
-
-        if before:
-            try:
-                before = datetime.fromisoformat(before)
-            except ValueError:
-                raise ValueError(f"Invalid date format for 'before': {before}. Please use ISO-8601 format.")
-            
-            where_clauses.append("messages.timestamp < ?")
-            params.append(before)
-
-        if sender_phone_number:
-            where_clauses.append("messages.sender = ?")
-            params.append(sender_phone_number)
-            
-        if chat_jid:
-            where_clauses.append("messages.chat_jid = ?")
-            params.append(chat_jid)
+        where_clauses, params = _message_filters(after, before, sender_phone_number, chat_jid)
             
         if query:
-            where_clauses.append("LOWER(messages.content) LIKE LOWER(?)")
-            params.append(f"%{query}%")
+            match_expression = to_match_expression(query)
+            if match_expression and search_index.attach(conn):
+                where_clauses.append("messages.rowid IN (SELECT rowid FROM search.messages_fts WHERE messages_fts MATCH ?)")
+                params.append(match_expression)
+            else:
+                # Index unavailable or still building
+                where_clauses.append("LOWER(messages.content) LIKE LOWER(?)")
+                params.append(f"%{query}%")
+            
+        # Keyset pagination: continue strictly after the previous page's last row
+        if page_key:
+            where_clauses.append("(messages.timestamp, messages.id) < (?, ?)")
+            params.extend(page_key)
             
         if where_clauses:
             query_parts.append("WHERE " + " AND ".join(where_clauses))
             
-        # Add pagination
-        offset = page * limit
-        query_parts.append("ORDER BY messages.timestamp DESC")
+        # Add pagination; one extra row tells us whether there is a next page
+        offset = 0 if page_key else page * limit
+        query_parts.append("ORDER BY messages.timestamp DESC, messages.id DESC")
         query_parts.append("LIMIT ? OFFSET ?")
-        params.extend([limit, offset])
+        params.extend([limit + 1, offset])
         
         cursor.execute(" ".join(query_parts), tuple(params))
         messages = cursor.fetchall()
         
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = encode_cursor("messages", messages[-1][0], messages[-1][6])
+        
         result = []
         for msg in messages:
             message = Message(
@@ -199,25 +225,95 @@ def list_messages(
             result.append(message)
             
         if include_context and result:
-            # Add context for each message
-            messages_with_context = []
-            for msg in result:
-                context = get_message_context(msg.id, context_before, context_after)
-                messages_with_context.extend(context.before)
-                messages_with_context.append(context.message)
-                messages_with_context.extend(context.after)
-            
-            return format_messages_list(messages_with_context, show_chat_info=True)
+            # Fetch the context windows for all matches in one query
+            result = get_messages_context(cursor, result, context_before, context_after)
             
-        # Format and display messages without context
-        return format_messages_list(result, show_chat_info=True)    
+        # Format and display messages
+        output = format_messages_list(result, show_chat_info=True)
+        if next_cursor:
+            output += f"\nnext_cursor: {next_cursor}\n"
+        return output
         
     except sqlite3.Error as e:
         print(f"Database error: {e}")
         return []
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
+
+
+def search_messages(
+    query: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    sender_phone_number: Optional[str] = None,
+    chat_jid: Optional[str] = None,
+    limit: int = 20
+) -> str:
+    """Full-text search over message content, sender and chat name, best matches first.
+
+    Supports "quoted phrases" and prefix* terms. Falls back to a substring match
+    ordered by time while the search index is unavailable or still being built.
+    """
+    try:
+        conn = pool.acquire()
+        cursor = conn.cursor()
+
+        match_expression = to_match_expression(query)
+        if not match_expression:
+            return format_messages_list([])
+
+        where_clauses, params = _message_filters(after, before, sender_phone_number, chat_jid)
+
+        if search_index.attach(conn):
+            query_parts = ["""
+                SELECT messages.timestamp, messages.sender, chats.name, messages.content, messages.is_from_me, chats.jid, messages.id, messages.media_type
+                FROM search.messages_fts AS fts
+                JOIN messages ON messages.rowid = fts.rowid
+                JOIN chats ON messages.chat_jid = chats.jid
+            """]
+            where_clauses.insert(0, "fts.messages_fts MATCH ?")
+            params.insert(0, match_expression)
+            # Weight content matches above sender and chat name matches
+            order_by = "bm25(fts.messages_fts, 10.0, 2.0, 1.0)"
+        else:
+            query_parts = ["""
+                SELECT messages.timestamp, messages.sender, chats.name, messages.content, messages.is_from_me, chats.jid, messages.id, messages.media_type
+                FROM messages
+                JOIN chats ON messages.chat_jid = chats.jid
+            """]
+            where_clauses.append("LOWER(messages.content) LIKE LOWER(?)")
+            params.append(f"%{query}%")
+            order_by = "messages.timestamp DESC"
+
+        query_parts.append("WHERE " + " AND ".join(where_clauses))
+        query_parts.append(f"ORDER BY {order_by}")
+        query_parts.append("LIMIT ?")
+        params.append(limit)
+
+        cursor.execute(" ".join(query_parts), tuple(params))
+
+        result = []
+        for msg in cursor.fetchall():
+            result.append(Message(
+                timestamp=datetime.fromisoformat(msg[0]),
+                sender=msg[1],
+                chat_name=msg[2],
+                content=msg[3],
+                is_from_me=msg[4],
+                chat_jid=msg[5],
+                id=msg[6],
+                media_type=msg[7]
+            ))
+
+        return format_messages_list(result, show_chat_info=True)
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return format_messages_list([])
+    finally:
+        if 'conn' in locals():
+            pool.release(conn)
 
 
 def get_message_context(
@@ -227,7 +323,7 @@ def get_message_context(
 ) -> MessageContext:
     """Get context around a specific message."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
         # Get the target message first
@@ -310,7 +406,95 @@ def get_message_context(
         raise
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
+
+
+CONTEXT_WINDOWS_QUERY = """
+    WITH targets AS (
+        SELECT json_extract(value, '$[0]') AS id, json_extract(value, '$[1]') AS chat_jid
+        FROM json_each(?)
+    ),
+    ranked AS (
+        SELECT messages.timestamp, messages.sender, chats.name, messages.content, messages.is_from_me, chats.jid, messages.id, messages.media_type,
+            ROW_NUMBER() OVER (PARTITION BY messages.chat_jid ORDER BY messages.timestamp, messages.id) AS rn
+        FROM messages
+        JOIN chats ON messages.chat_jid = chats.jid
+        WHERE messages.chat_jid IN (SELECT chat_jid FROM targets)
+    ),
+    anchors AS (
+        SELECT ranked.jid, ranked.rn
+        FROM ranked
+        JOIN targets ON ranked.id = targets.id AND ranked.jid = targets.chat_jid
+    )
+    SELECT DISTINCT ranked.*
+    FROM ranked
+    JOIN anchors ON ranked.jid = anchors.jid AND ranked.rn BETWEEN anchors.rn - ? AND anchors.rn + ?
+    ORDER BY ranked.jid, ranked.rn
+"""
+
+
+def get_messages_context(
+    cursor: sqlite3.Cursor,
+    messages: List[Message],
+    before: int = 1,
+    after: int = 1
+) -> List[Message]:
+    """Get the context around several messages with a single window-function query.
+
+    Overlapping or adjacent windows in the same chat are merged so every message
+    appears once. Merged segments follow the order of their first matched message;
+    messages inside a segment are chronological.
+    """
+    if not messages:
+        return []
+
+    targets = json.dumps([[msg.id, msg.chat_jid] for msg in messages])
+    cursor.execute(CONTEXT_WINDOWS_QUERY, (targets, max(before, 0), max(after, 0)))
+
+    rows_by_chat = {}
+    row_numbers = {}
+    for row in cursor.fetchall():
+        row_numbers[(row[5], row[6])] = row[8]
+        rows_by_chat.setdefault(row[5], {})[row[8]] = Message(
+            timestamp=datetime.fromisoformat(row[0]),
+            sender=row[1],
+            chat_name=row[2],
+            content=row[3],
+            is_from_me=row[4],
+            chat_jid=row[5],
+            id=row[6],
+            media_type=row[7]
+        )
+
+    # Row number of every matched message within its chat
+    anchors = [
+        (order, msg.chat_jid, row_numbers[(msg.chat_jid, msg.id)])
+        for order, msg in enumerate(messages)
+        if (msg.chat_jid, msg.id) in row_numbers
+    ]
+
+    # Merge windows per chat, remembering the earliest match order of each segment
+    segments = []
+    for chat_jid in {chat for _, chat, _ in anchors}:
+        windows = sorted(
+            (max(rn - before, 1), rn + after, order)
+            for order, chat, rn in anchors if chat == chat_jid
+        )
+        lo, hi, first = windows[0]
+        for w_lo, w_hi, w_order in windows[1:]:
+            if w_lo <= hi + 1:
+                hi = max(hi, w_hi)
+                first = min(first, w_order)
+            else:
+                segments.append((first, chat_jid, lo, hi))
+                lo, hi, first = w_lo, w_hi, w_order
+        segments.append((first, chat_jid, lo, hi))
+
+    result = []
+    for _, chat_jid, lo, hi in sorted(segments):
+        chat_rows = rows_by_chat[chat_jid]
+        result.extend(chat_rows[rn] for rn in range(lo, hi + 1) if rn in chat_rows)
+    return result
 
 
 def list_chats(
@@ -318,11 +502,18 @@ def list_chats(
     limit: int = 20,
     page: int = 0,
     include_last_message: bool = True,
-    sort_by: str = "last_active"
-) -> List[Chat]:
-    """Get chats matching the specified criteria."""
+    sort_by: str = "last_active",
+    cursor: Optional[str] = None
+) -> ChatPage:
+    """Get chats matching the specified criteria.
+
+    Pages are keyed on (last_message_time, jid), or (name, jid) when sorting by
+    name; ``page`` is only used when no cursor is given.
+    """
+    cursor_kind = "chats:last_active" if sort_by == "last_active" else "chats:name"
+    page_key = decode_cursor(cursor, cursor_kind) if cursor else None
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
         # Build base query
@@ -350,21 +541,41 @@ def list_chats(
             where_clauses.append("(LOWER(chats.name) LIKE LOWER(?) OR chats.jid LIKE ?)")
             params.extend([f"%{query}%", f"%{query}%"])
             
+        # Keyset pagination; COALESCE keeps NULL names/times comparable
+        if sort_by == "last_active":
+            sort_key = "COALESCE(chats.last_message_time, '')"
+            order_by = f"{sort_key} DESC, chats.jid DESC"
+            key_comparison = "<"
+        else:
+            sort_key = "COALESCE(chats.name, '')"
+            order_by = f"{sort_key}, chats.jid"
+            key_comparison = ">"
+            
+        if page_key:
+            where_clauses.append(f"({sort_key}, chats.jid) {key_comparison} (?, ?)")
+            params.extend(page_key)
+            
         if where_clauses:
             query_parts.append("WHERE " + " AND ".join(where_clauses))
             
         # Add sorting
-        order_by = "chats.last_message_time DESC" if sort_by == "last_active" else "chats.name"
         query_parts.append(f"ORDER BY {order_by}")
         
-        # Add pagination
-        offset = (page ) * limit
+        # Add pagination; one extra row tells us whether there is a next page
+        offset = 0 if page_key else page * limit
         query_parts.append("LIMIT ? OFFSET ?")
-        params.extend([limit, offset])
+        params.extend([limit + 1, offset])
         
         cursor.execute(" ".join(query_parts), tuple(params))
         chats = cursor.fetchall()
         
+        next_cursor = None
+        if len(chats) > limit:
+            chats = chats[:limit]
+            last = chats[-1]
+            sort_value = (last[2] if sort_by == "last_active" else last[1]) or ""
+            next_cursor = encode_cursor(cursor_kind, sort_value, last[0])
+        
         result = []
         for chat_data in chats:
             chat = Chat(
@@ -377,36 +588,60 @@ def list_chats(
             )
             result.append(chat)
             
-        return result
+        return ChatPage(chats=result, next_cursor=next_cursor)
         
     except sqlite3.Error as e:
         print(f"Database error: {e}")
-        return []
+        return ChatPage(chats=[])
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
 
 
 def search_contacts(query: str) -> List[Contact]:
     """Search contacts by name or phone number."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
         # Split query into characters to support partial matching
         search_pattern = '%' +query + '%'
         
-        cursor.execute("""
-            SELECT DISTINCT 
-                jid,
-                name
-            FROM chats
-            WHERE 
-                (LOWER(name) LIKE LOWER(?) OR LOWER(jid) LIKE LOWER(?))
-                AND jid NOT LIKE '%@g.us'
-            ORDER BY name, jid
-            LIMIT 50
-        """, (search_pattern, search_pattern))
+        # Numbers go through the contact index: exact, prefix or local-number suffix
+        match = phone_match(query, prefix=True, min_suffix=3)
+        if not match:
+            cursor.execute("""
+                SELECT jid, name
+                FROM chats
+                WHERE LOWER(name) LIKE LOWER(?) AND jid NOT LIKE '%@g.us'
+                ORDER BY name, jid
+                LIMIT 50
+            """, (search_pattern,))
+        elif contact_index.attach(conn):
+            clause, params = match
+            cursor.execute(f"""
+                SELECT jid, name
+                FROM chats
+                WHERE LOWER(name) LIKE LOWER(?) AND jid NOT LIKE '%@g.us'
+                UNION
+                SELECT k.jid, k.name
+                FROM contacts.contacts k
+                WHERE {clause} AND NOT k.is_group
+                ORDER BY name, jid
+                LIMIT 50
+            """, (search_pattern, *params))
+        else:
+            cursor.execute("""
+                SELECT
+                    jid,
+                    name
+                FROM chats
+                WHERE 
+                    (LOWER(name) LIKE LOWER(?) OR LOWER(jid) LIKE LOWER(?))
+                    AND jid NOT LIKE '%@g.us'
+                ORDER BY name, jid
+                LIMIT 50
+            """, (search_pattern, search_pattern))
         
         contacts = cursor.fetchall()
         
@@ -426,23 +661,33 @@ def search_contacts(query: str) -> List[Contact]:
         return []
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
 
 
-def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Chat]:
+def get_contact_chats(jid: str, limit: int = 20, page: int = 0, cursor: Optional[str] = None) -> ChatPage:
     """Get all chats involving the contact.
     
     Args:
         jid: The contact's JID to search for
         limit: Maximum number of chats to return (default 20)
-        page: Page number for pagination (default 0)
+        page: Page number for pagination, used only without a cursor (default 0)
+        cursor: next_cursor from a previous page, keyed on (last_message_time, jid)
     """
+    page_key = decode_cursor(cursor, "contact_chats") if cursor else None
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT DISTINCT
+        params = [jid, jid]
+        keyset_clause = ""
+        if page_key:
+            keyset_clause = "AND (COALESCE(c.last_message_time, ''), c.jid) < (?, ?)"
+            params.extend(page_key)
+        params.extend([limit + 1, 0 if page_key else page * limit])
+        
+        # One row per chat so (last_message_time, jid) is a unique keyset position
+        cursor.execute(f"""
+            SELECT
                 c.jid,
                 c.name,
                 c.last_message_time,
@@ -450,14 +695,25 @@ def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Chat]:
                 m.sender as last_sender,
                 m.is_from_me as last_is_from_me
             FROM chats c
-            JOIN messages m ON c.jid = m.chat_jid
-            WHERE m.sender = ? OR c.jid = ?
-            ORDER BY c.last_message_time DESC
+            LEFT JOIN messages m ON c.jid = m.chat_jid
+                AND c.last_message_time = m.timestamp
+            WHERE c.jid IN (
+                SELECT ?
+                UNION
+                SELECT s.chat_jid FROM messages s WHERE s.sender = ?
+            )
+            {keyset_clause}
+            ORDER BY COALESCE(c.last_message_time, '') DESC, c.jid DESC
             LIMIT ? OFFSET ?
-        """, (jid, jid, limit, page * limit))
+        """, tuple(params))
         
         chats = cursor.fetchall()
         
+        next_cursor = None
+        if len(chats) > limit:
+            chats = chats[:limit]
+            next_cursor = encode_cursor("contact_chats", chats[-1][2] or "", chats[-1][0])
+        
         result = []
         for chat_data in chats:
             chat = Chat(
@@ -470,22 +726,24 @@ def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Chat]:
             )
             result.append(chat)
             
-        return result
+        return ChatPage(chats=result, next_cursor=next_cursor)
         
     except sqlite3.Error as e:
         print(f"Database error: {e}")
-        return []
+        return ChatPage(chats=[])
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
 
 
 def get_last_interaction(jid: str) -> str:
     """Get most recent message involving the contact."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
+        # Latest message sent by the contact and latest message in their chat,
+        # each an index seek, instead of an OR that walks every message by time
         cursor.execute("""
             SELECT 
                 m.timestamp,
@@ -496,10 +754,20 @@ def get_last_interaction(jid: str) -> str:
                 c.jid,
                 m.id,
                 m.media_type
-            FROM messages m
+            FROM (
+                SELECT * FROM (
+                    SELECT rowid AS message_rowid, timestamp FROM messages
+                    WHERE sender = ? ORDER BY timestamp DESC LIMIT 1
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT rowid AS message_rowid, timestamp FROM messages
+                    WHERE chat_jid = ? ORDER BY timestamp DESC LIMIT 1
+                )
+            ) latest
+            JOIN messages m ON m.rowid = latest.message_rowid
             JOIN chats c ON m.chat_jid = c.jid
-            WHERE m.sender = ? OR c.jid = ?
-            ORDER BY m.timestamp DESC
+            ORDER BY latest.timestamp DESC
             LIMIT 1
         """, (jid, jid))
         
@@ -526,13 +794,13 @@ def get_last_interaction(jid: str) -> str:
         return None
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
 
 
 def get_chat(chat_jid: str, include_last_message: bool = True) -> Optional[Chat]:
     """Get chat metadata by JID."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
         query = """
@@ -574,29 +842,53 @@ def get_chat(chat_jid: str, include_last_message: bool = True) -> Optional[Chat]
         return None
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
 
 
 def get_direct_chat_by_contact(sender_phone_number: str) -> Optional[Chat]:
     """Get chat metadata by sender phone number."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = pool.acquire()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                c.jid,
-                c.name,
-                c.last_message_time,
-                m.content as last_message,
-                m.sender as last_sender,
-                m.is_from_me as last_is_from_me
-            FROM chats c
-            LEFT JOIN messages m ON c.jid = m.chat_jid 
-                AND c.last_message_time = m.timestamp
-            WHERE c.jid LIKE ? AND c.jid NOT LIKE '%@g.us'
-            LIMIT 1
-        """, (f"%{sender_phone_number}%",))
+        match = phone_match(sender_phone_number)
+        if not match:
+            return None
+
+        if contact_index.attach(conn):
+            # An exact number wins over a local-number suffix, then the most recently active chat
+            clause, params = match
+            cursor.execute(f"""
+                SELECT 
+                    c.jid,
+                    c.name,
+                    c.last_message_time,
+                    m.content as last_message,
+                    m.sender as last_sender,
+                    m.is_from_me as last_is_from_me
+                FROM contacts.contacts k
+                JOIN chats c ON c.jid = k.jid
+                LEFT JOIN messages m ON c.jid = m.chat_jid 
+                    AND c.last_message_time = m.timestamp
+                WHERE {clause} AND NOT k.is_group
+                ORDER BY k.digits = ? DESC, COALESCE(c.last_message_time, '') DESC
+                LIMIT 1
+            """, (*params, normalize_phone(sender_phone_number)))
+        else:
+            cursor.execute("""
+                SELECT 
+                    c.jid,
+                    c.name,
+                    c.last_message_time,
+                    m.content as last_message,
+                    m.sender as last_sender,
+                    m.is_from_me as last_is_from_me
+                FROM chats c
+                LEFT JOIN messages m ON c.jid = m.chat_jid 
+                    AND c.last_message_time = m.timestamp
+                WHERE c.jid LIKE ? AND c.jid NOT LIKE '%@g.us'
+                LIMIT 1
+            """, (f"%{sender_phone_number}%",))
         
         chat_data = cursor.fetchone()
         
@@ -617,37 +909,50 @@ def get_direct_chat_by_contact(sender_phone_number: str) -> Optional[Chat]:
         return None
     finally:
         if 'conn' in locals():
-            conn.close()
+            pool.release(conn)
+
+async def _send(payload: dict) -> Tuple[bool, str]:
+    """POST a send request to the bridge and return (success, status message)."""
+    try:
+        status_code, result = await bridge.post("/send", payload)
+    except httpx.HTTPError as e:
+        return False, f"Request error: {str(e) or type(e).__name__}"
 
-def send_message(recipient: str, message: str) -> Tuple[bool, str]:
+    if isinstance(result, dict):
+        return result.get("success", False), result.get("message", "Unknown response")
+    return False, f"Error: HTTP {status_code} - {result}"
+
+async def send_message(recipient: str, message: str) -> Tuple[bool, str]:
     try:
         # Validate input
         if not recipient:
             return False, "Recipient must be provided"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "message": message,
         }
+        return await _send(payload)
         
-        response = requests.post(url, json=payload)
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("success", False), result.get("message", "Unknown response")
-        else:
-            return False, f"Error: HTTP {response.status_code} - {response.text}"
-            
-    except requests.RequestException as e:
-        return False, f"Request error: {str(e)}"
-    except json.JSONDecodeError:
-        return False, f"Error parsing response: {response.text}"
     except Exception as e:
         return False, f"Unexpected error: {str(e)}"
 
-def send_file(recipient: str, media_path: str) -> Tuple[bool, str]:
+async def send_messages(recipients: List[str], message: str) -> List[Tuple[str, bool, str]]:
+    """Send the same message to many recipients concurrently.
+    
+    Returns one (recipient, success, status message) tuple per distinct recipient, in order.
+    """
+    semaphore = asyncio.Semaphore(SEND_BATCH_CONCURRENCY)
+
+    async def send_one(recipient: str) -> Tuple[str, bool, str]:
+        async with semaphore:
+            success, status_message = await send_message(recipient, message)
+            return recipient, success, status_message
+
+    unique_recipients = list(dict.fromkeys(r.strip() for r in recipients if r and r.strip()))
+    return await asyncio.gather(*(send_one(recipient) for recipient in unique_recipients))
+
+async def send_file(recipient: str, media_path: str) -> Tuple[bool, str]:
     try:
         # Validate input
         if not recipient:
@@ -659,29 +964,16 @@ def send_file(recipient: str, media_path: str) -> Tuple[bool, str]:
         if not os.path.isfile(media_path):
             return False, f"Media file not found: {media_path}"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "media_path": media_path
         }
+        return await _send(payload)
         
-        response = requests.post(url, json=payload)
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("success", False), result.get("message", "Unknown response")
-        else:
-            return False, f"Error: HTTP {response.status_code} - {response.text}"
-            
-    except requests.RequestException as e:
-        return False, f"Request error: {str(e)}"
-    except json.JSONDecodeError:
-        return False, f"Error parsing response: {response.text}"
     except Exception as e:
         return False, f"Unexpected error: {str(e)}"
 
-def send_audio_message(recipient: str, media_path: str) -> Tuple[bool, str]:
+async def send_audio_message(recipient: str, media_path: str) -> Tuple[bool, str]:
     try:
         # Validate input
         if not recipient:
@@ -695,35 +987,25 @@ def send_audio_message(recipient: str, media_path: str) -> Tuple[bool, str]:
 
         if not media_path.endswith(".ogg"):
             try:
-                media_path = audio.convert_to_opus_ogg_temp(media_path)
+                media_path = await audio.transcode_cache.convert(media_path)
             except Exception as e:
                 return False, f"Error converting file to opus ogg. You likely need to install ffmpeg: {str(e)}"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "media_path": media_path
         }
+        return await _send(payload)
         
-        response = requests.post(url, json=payload)
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("success", False), result.get("message", "Unknown response")
-        else:
-            return False, f"Error: HTTP {response.status_code} - {response.text}"
-            
-    except requests.RequestException as e:
-        return False, f"Request error: {str(e)}"
-    except json.JSONDecodeError:
-        return False, f"Error parsing response: {response.text}"
     except Exception as e:
         return False, f"Unexpected error: {str(e)}"
 
-def download_media(message_id: str, chat_jid: str) -> Optional[str]:
+async def download_media(message_id: str, chat_jid: str) -> Optional[str]:
     """Download media from a message and return the local file path.
     
+    Files already downloaded are served from the local media cache, and
+    concurrent requests for the same message share one bridge download.
+    
     Args:
         message_id: The ID of the message containing the media
         chat_jid: The JID of the chat containing the message
@@ -731,17 +1013,19 @@ def download_media(message_id: str, chat_jid: str) -> Optional[str]:
     Returns:
         The local file path if download was successful, None otherwise
     """
+    return await media_cache.get(message_id, chat_jid, _download_from_bridge)
+
+async def _download_from_bridge(message_id: str, chat_jid: str) -> Optional[str]:
     try:
-        url = f"{WHATSAPP_API_BASE_URL}/download"
         payload = {
             "message_id": message_id,
             "chat_jid": chat_jid
         }
         
-        response = requests.post(url, json=payload)
+        # Downloading twice is harmless, so timeouts are retried too
+        status_code, result = await bridge.post("/download", payload, idempotent=True)
         
-        if response.status_code == 200:
-            result = response.json()
+        if status_code == 200 and isinstance(result, dict):
             if result.get("success", False):
                 path = result.get("path")
                 print(f"Media downloaded successfully: {path}")
@@ -750,14 +1034,11 @@ def download_media(message_id: str, chat_jid: str) -> Optional[str]:
                 print(f"Download failed: {result.get('message', 'Unknown error')}")
                 return None
         else:
-            print(f"Error: HTTP {response.status_code} - {response.text}")
+            print(f"Error: HTTP {status_code} - {result}")
             return None
             
-    except requests.RequestException as e:
-        print(f"Request error: {str(e)}")
-        return None
-    except json.JSONDecodeError:
-        print(f"Error parsing response: {response.text}")
+    except httpx.HTTPError as e:
+        print(f"Request error: {str(e) or type(e).__name__}")
         return None
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -0,0 +1,80 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from server.gmail.batch import fetch_metadata
+from server.google_service import GoogleServicePool, ScopedService
+
+
+class FakeRequest:
+    def __init__(self, message_id):
+        self.message_id = message_id
+
+
+class FakeBatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        for request, request_id in self.requests:
+            if request.message_id == "missing":
+                self.callback(request_id, None, Exception("Not Found"))
+            else:
+                self.callback(request_id, {"id": request.message_id}, None)
+
+
+class FakeClient:
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback)
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, format, metadataHeaders):
+        return FakeRequest(id)
+
+
+class FakePool:
+    api = "gmail"
+
+    def __init__(self):
+        self.checkout_threads = []
+
+    @contextmanager
+    def checkout(self):
+        self.checkout_threads.append(threading.get_ident())
+        yield FakeClient()
+
+
+def test_fetch_metadata_checks_out_a_client_per_batch_thread(monkeypatch):
+    monkeypatch.setattr("server.gmail.batch.BATCH_SIZE", 2)
+    pool = FakePool()
+    service = ScopedService(pool)
+
+    # The tool thread holds a scoped client; the batch threads must not rely on it
+    with service.scope():
+        results, errors = fetch_metadata(service, ["a", "b", "c", "missing"], ["From"])
+
+    assert set(results) == {"a", "b", "c"}
+    assert errors == {"missing": "Not Found"}
+    assert threading.get_ident() not in pool.checkout_threads[1:]
+
+
+def test_checkout_keeps_idle_client_when_refresh_fails():
+    pool = GoogleServicePool("gmail", "v1", "/nonexistent/token.pickle")
+    idle = object()
+    pool._idle.put(idle)
+
+    with pytest.raises(FileNotFoundError):
+        with pool.checkout():
+            pass
+
+    assert pool._idle.get_nowait() is idle
@@ -0,0 +1,75 @@
+import threading
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from server.gmail.store import MetadataStore
+
+
+class FakeCall:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result()
+
+
+class FakeService:
+    def __init__(self, history):
+        self.history_calls = 0
+        self._history = history
+
+    def users(self):
+        return self
+
+    def history(self):
+        return self
+
+    def getProfile(self, userId):
+        return FakeCall(lambda: {"historyId": "100"})
+
+    def list(self, **params):
+        self.history_calls += 1
+        return FakeCall(self._history)
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"error")
+
+
+def test_sync_serves_store_on_transient_history_error(tmp_path):
+    store = MetadataStore(path=str(tmp_path / "metadata.db"), sync_interval=0)
+    store._reset({"historyId": "100"})
+
+    def rate_limited():
+        raise http_error(429)
+
+    service = FakeService(rate_limited)
+    store.sync(service)
+
+    assert service.history_calls == 1
+    assert store._get_state("history_id") == "100"
+
+
+def test_sync_does_not_hold_store_lock_during_api_calls(tmp_path):
+    store = MetadataStore(path=str(tmp_path / "metadata.db"), sync_interval=0)
+    store._reset({"historyId": "100"})
+    lock_free = []
+
+    def try_lock():
+        acquired = store._lock.acquire(timeout=1)
+        lock_free.append(acquired)
+        if acquired:
+            store._lock.release()
+
+    def history():
+        # Another thread must be able to read the store while history.list runs
+        reader = threading.Thread(target=try_lock)
+        reader.start()
+        reader.join()
+        return {"historyId": "101", "history": [{"messagesDeleted": [{"message": {"id": "a"}}]}]}
+
+    store.sync(FakeService(history))
+
+    assert lock_free == [True]
+    assert store._get_state("history_id") == "101"
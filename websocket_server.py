@@ -2,18 +2,32 @@
 FastAPI WebSocket server for ORBIT Agent
 Integrates with the existing React Agent to provide real-time updates
 """
-import json
 import asyncio
-from typing import Dict, Any, List, Union
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage, BaseMessage
 
 from client.agent import ORBITAgent
+from client.pool import AgentPool
+from client.config import (
+    STREAM_TOKENS,
+    WS_INBOUND_QUEUE_SIZE,
+    WS_SEND_TIMEOUT,
+    WS_SEND_BUFFER_SIZE,
+    WS_WORKERS,
+    INBOX_WATCHERS,
+    SESSION_STORE
+)
+from client.events import EventCodec, EventCoalescer
+from client.sessions import SessionStore, create_session_store, new_session_id
+from client.watchers import InboxWatcher
 
 # Enhanced logging configuration
 import logging
@@ -27,106 +41,203 @@ os.makedirs("logs", exist_ok=True)
 logger = logging.getLogger("orbit_websocket")
 logger.setLevel(logging.DEBUG)
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-console_handler.setFormatter(console_formatter)
+# Guarded so importing the module a second time (e.g. as "websocket_server" from
+# "__main__") does not attach a second set of handlers
+if not logger.handlers:
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    console_handler.setFormatter(console_formatter)
+
+    # File handler with rotation
+    file_handler = RotatingFileHandler(
+        "logs/orbit_websocket.log",
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+    )
+    file_handler.setFormatter(file_formatter)
+
+    # Add handlers to logger
+    logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
+
+    # Route logs from the shared client modules (agent pool etc.) to the same handlers
+    client_logger = logging.getLogger("client")
+    client_logger.setLevel(logging.DEBUG)
+    client_logger.addHandler(console_handler)
+    client_logger.addHandler(file_handler)
 
-# File handler with rotation
-file_handler = RotatingFileHandler(
-    "logs/orbit_websocket.log",
-    maxBytes=10*1024*1024,  # 10MB
-    backupCount=5
-)
-file_handler.setLevel(logging.DEBUG)
-file_formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-)
-file_handler.setFormatter(file_formatter)
+# Define a connection manager to handle WebSocket connections
 
-# Add handlers to logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
 
-# Define a connection manager to handle WebSocket connections
 
+class Connection:
+    """One client socket and the frames waiting to be written to it"""
+
+    def __init__(self, websocket: WebSocket, codec: EventCodec, buffer_size: int):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.codec = codec
+        # Bounded: a client this far behind is lagging and gets disconnected
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Active connections keyed by connection ID.
+
+    Every connection has a bounded outbox drained by its own writer task, so
+    a slow client only delays itself: broadcasts encode the event once per
+    wire encoding and enqueue it everywhere without awaiting any socket. A
+    client whose outbox overflows (WS_SEND_BUFFER_SIZE frames behind) or
+    whose socket does not take a frame within WS_SEND_TIMEOUT is disconnected;
+    it can reconnect and resume its session.
+    """
+
+    def __init__(self, buffer_size: int = WS_SEND_BUFFER_SIZE):
+        self.connections: Dict[str, Connection] = {}
+        self.buffer_size = buffer_size
+        self.lagging_disconnects = 0
         logger.info("ConnectionManager initialized")
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, codec: EventCodec = None) -> Connection:
+        codec = codec or EventCodec()
         try:
-            await websocket.accept()
-            self.active_connections.append(websocket)
-            client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
-            logger.info(f"WebSocket connection established with client {client_info}. Total connections: {len(self.active_connections)}")
+            await websocket.accept(subprotocol=codec.subprotocol)
+            connection = Connection(websocket, codec, self.buffer_size)
+            connection.writer = asyncio.create_task(self._write(connection))
+            self.connections[connection.id] = connection
+            logger.info(f"WebSocket connection established with client {connection.client_info}. Total connections: {len(self.connections)}")
+            return connection
         except Exception as e:
             logger.error(f"Failed to establish WebSocket connection: {str(e)}")
             raise
 
-    def disconnect(self, websocket: WebSocket):
+    def disconnect(self, connection_id: str):
+        """Forget a connection; frames already queued are still written unless it is lagging"""
+        connection = self.connections.pop(connection_id, None)
+        if connection is None:
+            logger.debug(f"Connection {connection_id} already disconnected")
+            return
         try:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
-                client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
-                logger.info(f"WebSocket connection closed for client {client_info}. Remaining connections: {len(self.active_connections)}")
-            else:
-                logger.warning("Attempted to disconnect a WebSocket that was not in active connections")
-        except Exception as e:
-            logger.error(f"Error during WebSocket disconnect: {str(e)}")
+            # The writer stops after the frames queued before this sentinel
+            connection.outbox.put_nowait(None)
+        except asyncio.QueueFull:
+            if connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
+        logger.info(f"WebSocket connection closed for client {connection.client_info}. Remaining connections: {len(self.connections)}")
+
+    def _drop_lagging(self, connection: Connection, reason: str):
+        if connection.id not in self.connections:
+            return
+        logger.warning(f"Disconnecting lagging client {connection.client_info}: {reason}")
+        self.lagging_disconnects += 1
+        self.disconnect(connection.id)
+        # Closing the socket wakes the connection's reader, which cancels its running turn
+        asyncio.create_task(self._close(connection))
+
+    async def _close(self, connection: Connection):
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=1013), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+    async def _write(self, connection: Connection):
+        """Drain one connection's outbox onto its socket"""
+        while True:
+            frame = await connection.outbox.get()
+            if frame is None:
+                return
+            try:
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(connection.websocket.send_bytes(frame), WS_SEND_TIMEOUT)
+                else:
+                    await asyncio.wait_for(connection.websocket.send_text(frame), WS_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The client stopped reading and the socket buffer is full
+                self._drop_lagging(connection, f"no frame accepted within {WS_SEND_TIMEOUT}s")
+                return
+            except Exception as e:
+                if connection.id in self.connections:
+                    logger.error(f"Failed to send message to client {connection.client_info}: {str(e) or type(e).__name__}")
+                    self.disconnect(connection.id)
+                return
+
+    async def send_personal_message(self, message: Union[dict, list], connection_id: str):
+        """Queue one event, or a coalesced list of events, as a single frame for one connection"""
+        connection = self.connections.get(connection_id)
+        if connection is None:
+            logger.debug(f"Dropping message for disconnected connection {connection_id}")
+            return
         try:
-            message_str = json.dumps(message)
-            await websocket.send_text(message_str)
-            logger.debug(f"Sent message to client: {message.get('type', 'unknown_type')}")
+            frame = connection.codec.encode(message)
+            # Waits while the outbox is full, which slows the producing turn down to the client's pace
+            await asyncio.wait_for(connection.outbox.put(frame), WS_SEND_TIMEOUT)
+            if isinstance(message, list):
+                logger.debug(f"Queued {len(message)} coalesced events for client")
+            else:
+                logger.debug(f"Queued message for client: {message.get('type', 'unknown_type')}")
+        except asyncio.TimeoutError:
+            self._drop_lagging(connection, f"send buffer full for {WS_SEND_TIMEOUT}s")
         except Exception as e:
-            client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
-            logger.error(f"Failed to send message to client {client_info}: {str(e)}")
+            logger.error(f"Failed to send message to client {connection.client_info}: {str(e) or type(e).__name__}")
             # Remove the problematic connection
-            self.disconnect(websocket)
+            self.disconnect(connection_id)
 
-    async def broadcast(self, message: dict):
-        if not self.active_connections:
+    def broadcast(self, message: dict):
+        """Queue an event for every connection without waiting on any of them"""
+        if not self.connections:
             logger.debug("No active connections for broadcast")
             return
             
-        logger.info(f"Broadcasting message of type '{message.get('type', 'unknown')}' to {len(self.active_connections)} connections")
-        disconnected_connections = []
-        
-        for connection in self.active_connections:
+        logger.info(f"Broadcasting message of type '{message.get('type', 'unknown')}' to {len(self.connections)} connections")
+        # Encode once per wire encoding, not once per connection
+        frames = {}
+        for connection in list(self.connections.values()):
+            subprotocol = connection.codec.subprotocol
+            if subprotocol not in frames:
+                frames[subprotocol] = connection.codec.encode(message)
             try:
-                await connection.send_text(json.dumps(message))
-            except Exception as e:
-                logger.warning(f"Failed to broadcast to a connection, marking for removal: {str(e)}")
-                disconnected_connections.append(connection)
-        
-        # Remove broken connections
-        for conn in disconnected_connections:
-            self.disconnect(conn)
+                connection.outbox.put_nowait(frames[subprotocol])
+            except asyncio.QueueFull:
+                self._drop_lagging(connection, f"{self.buffer_size} frames behind")
 
 
 class ORBITWebSocketAgent(ORBITAgent):
     """Extended ORBIT Agent with WebSocket event emission"""
     
-    def __init__(self, connection_manager: ConnectionManager, websocket: WebSocket):
-        super().__init__()
+    def __init__(self, connection_manager: ConnectionManager, connection: Connection, pool: AgentPool = None,
+                 session_store: SessionStore = None, session_id: str = None):
+        super().__init__(pool)
         self.connection_manager = connection_manager
-        self.websocket = websocket
+        self.connection = connection
+        self.websocket = connection.websocket
+        self.session_store = session_store
+        self.session_id = session_id or new_session_id()
+        # Events of a burst (tool_called + tool_executing, token deltas) share frames
+        self.outbound = EventCoalescer(lambda payload: connection_manager.send_personal_message(payload, connection.id))
         self.execution_id = None
+        # The running chat() turn, cancelled by a client "cancel" message or a disconnect
+        self.current_run: Optional[asyncio.Task] = None
+        self._cancel_requested = False
         # Override the messages list with proper typing
         self.messages: List[Union[SystemMessage, HumanMessage, AIMessage, BaseMessage]] = []
-        client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
-        logger.info(f"ORBITWebSocketAgent initialized for client {client_info}")
+        logger.info(f"ORBITWebSocketAgent initialized for client {connection.client_info}")
 
     async def emit_event(self, event_type: str, data: Dict[str, Any]):
         """Emit events to connected WebSocket clients"""
+        if self.connection.id not in self.connection_manager.connections:
+            # The client went away or stopped reading; stop spending model and tool time on it
+            self.cancel()
+            return
         try:
             event = {
                 "type": event_type,
@@ -134,7 +245,7 @@ class ORBITWebSocketAgent(ORBITAgent):
                 "execution_id": self.execution_id,
                 "data": data
             }
-            await self.connection_manager.send_personal_message(event, self.websocket)
+            await self.outbound.put(event)
             logger.debug(f"Emitted event '{event_type}' with execution_id '{self.execution_id}'")
         except Exception as e:
             logger.error(f"Failed to emit event '{event_type}': {str(e)}")
@@ -148,11 +259,46 @@ class ORBITWebSocketAgent(ORBITAgent):
             await super().initialize()
             logger.info("Agent initialized successfully")
             await self.emit_event("agent_ready", {"message": "Agent initialized successfully"})
+            await self._resume_session()
         except Exception as e:
             logger.error(f"Agent initialization failed: {str(e)}")
             await self.emit_event("error", {"message": f"Initialization failed: {str(e)}"})
             raise
 
+    async def _resume_session(self):
+        """Restore this session's conversation from the store, if it has one, and tell the client"""
+        stored = None
+        if self.session_store:
+            try:
+                stored = await asyncio.to_thread(self.session_store.load, self.session_id)
+            except Exception as e:
+                logger.error(f"Failed to load session {self.session_id}: {str(e)}")
+        if stored:
+            conversation, summary = stored
+            # The system message is rebuilt from the current prompt and the saved summary
+            self.messages = [self.history.restore(self.messages[0], summary)] + conversation
+            logger.info(f"Resumed session {self.session_id} with {len(conversation)} messages")
+
+        await self.emit_event("session", {
+            "session_id": self.session_id,
+            "resumed": bool(stored),
+            # The visible transcript, so a reloaded client can redraw the conversation
+            "history": [
+                {"role": "user" if isinstance(message, HumanMessage) else "assistant", "content": message.content}
+                for message in self.messages
+                if isinstance(message, (HumanMessage, AIMessage)) and message.content
+            ]
+        })
+
+    async def save_session(self):
+        if not self.session_store:
+            return
+        conversation = [message for message in self.messages if not isinstance(message, SystemMessage)]
+        try:
+            await asyncio.to_thread(self.session_store.save, self.session_id, conversation, self.history.summary)
+        except Exception as e:
+            logger.error(f"Failed to save session {self.session_id}: {str(e)}")
+
     async def chat(self, user_input: str):
         """Override chat to emit detailed execution events"""
         if not self.agent:
@@ -178,14 +324,16 @@ class ORBITWebSocketAgent(ORBITAgent):
             response = await self._tracked_invoke({"messages": self.messages})
             
             reply = response['messages'][-1].content
+            self.last_usage = self.history.usage(self.messages, response['messages'])
             # Add assistant message as proper LangChain message object
             self.messages.append(AIMessage(content=reply))
             
-            logger.info(f"Agent response generated for execution_id: {self.execution_id}")
+            logger.info(f"Agent response generated for execution_id: {self.execution_id} (tokens: {self.last_usage})")
             logger.debug(f"Agent response: {reply}")
             
             await self.emit_event("agent_response", {
                 "message": reply,
+                "usage": self.last_usage,
                 "execution_completed": True
             })
             
@@ -196,6 +344,54 @@ class ORBITWebSocketAgent(ORBITAgent):
             await self.emit_event("error", {"message": f"Agent processing failed: {str(e)}"})
             raise Exception(f"Agent processing failed: {str(e)}")
 
+    async def run_turn(self, user_input: str) -> Optional[str]:
+        """Run chat() as a cancellable task and return the reply, or None if it was cancelled"""
+        history_length = len(self.messages)
+        self._cancel_requested = False
+        self.current_run = asyncio.create_task(self.chat(user_input))
+        try:
+            reply = await self.current_run
+        except asyncio.CancelledError:
+            if not self._cancel_requested:
+                # The connection handler itself is shutting down
+                raise
+            # Drop the abandoned turn so the next one starts from a consistent history
+            del self.messages[history_length:]
+            logger.info(f"Cancelled execution_id: {self.execution_id}")
+            await self.emit_event("agent_cancelled", {"message": "Request cancelled"})
+            return None
+        finally:
+            self.current_run = None
+
+        # Compact after replying so summarization never delays the response
+        self.messages = await self.history.compact(self.messages)
+        await self.save_session()
+        return reply
+
+    def cancel(self) -> bool:
+        """Abort the running turn, including its model call and pending tool calls"""
+        if self.current_run is None or self.current_run.done():
+            return False
+        self._cancel_requested = True
+        self.current_run.cancel()
+        return True
+
+    async def _emit_token(self, message_chunk, metadata):
+        """Forward a text delta produced by the agent node as an agent_token event"""
+        if metadata.get("langgraph_node") != "agent" or not isinstance(message_chunk, AIMessageChunk):
+            return
+
+        content = message_chunk.content
+        if isinstance(content, list):
+            # Gemini may send content as a list of typed parts
+            content = "".join(
+                part if isinstance(part, str) else part.get("text", "")
+                for part in content
+                if isinstance(part, str) or part.get("type") == "text"
+            )
+        if content:
+            await self.emit_event("agent_token", {"delta": content})
+
     async def _tracked_invoke(self, input_data):
         """Custom invoke method that tracks tool execution using LangGraph streaming"""
         logger.debug(f"Starting tracked invoke for execution_id: {self.execution_id}")
@@ -204,11 +400,18 @@ class ORBITWebSocketAgent(ORBITAgent):
             raise RuntimeError("Agent not initialized")
         
         final_response = None
-        current_tool_name = None
+        pending_tools = {}
+        streamed_messages = []
         
         try:
-            # Use astream with "updates" mode to capture agent progress and tool executions
-            async for chunk in self.agent.astream(input_data, stream_mode="updates"):
+            # "updates" mode captures agent progress and tool executions,
+            # "messages" mode yields the LLM's token deltas as they arrive
+            stream_mode = ["updates", "messages"] if STREAM_TOKENS else ["updates"]
+            async for mode, chunk in self.agent.astream(input_data, stream_mode=stream_mode):
+                if mode == "messages":
+                    await self._emit_token(*chunk)
+                    continue
+
                 logger.debug(f"Received stream chunk: {chunk}")
                 
                 # chunk is a dict with node names as keys
@@ -216,6 +419,10 @@ class ORBITWebSocketAgent(ORBITAgent):
                     for node_name, node_data in chunk.items():
                         logger.debug(f"Processing node '{node_name}' with data type: {type(node_data)}")
                         
+                        if node_name in ("agent", "tools") and hasattr(node_data, 'get'):
+                            # Collect every message of the turn for token accounting
+                            streamed_messages.extend(node_data.get('messages', []))
+                        
                         if node_name == "agent":
                             # Agent node - look for tool calls
                             if hasattr(node_data, 'get') and 'messages' in node_data:
@@ -223,47 +430,45 @@ class ORBITWebSocketAgent(ORBITAgent):
                                 if messages and len(messages) > 0:
                                     latest_message = messages[-1]
                                     
-                                    # Check for tool calls in AI message
+                                    # Check for tool calls in AI message; several may run concurrently
                                     if hasattr(latest_message, 'tool_calls') and latest_message.tool_calls:
                                         for tool_call in latest_message.tool_calls:
                                             tool_name = tool_call.get('name', 'unknown_tool')
-                                            current_tool_name = tool_name
+                                            tool_call_id = tool_call.get('id')
+                                            pending_tools[tool_call_id] = tool_name
                                             
-                                            logger.info(f"Tool called: {tool_name}")
+                                            logger.info(f"Tool called: {tool_name} ({tool_call_id})")
                                             
                                             await self.emit_event("tool_called", {
                                                 "tool_name": tool_name,
+                                                "tool_call_id": tool_call_id,
                                                 "description": f"Executing {tool_name}",
                                                 "arguments": tool_call.get('args', {})
                                             })
                                             
                                             await self.emit_event("tool_executing", {
                                                 "tool_name": tool_name,
+                                                "tool_call_id": tool_call_id,
                                                 "status": "executing"
                                             })
                         
                         elif node_name == "tools":
-                            # Tools node - tool execution completed
-                            if current_tool_name:
-                                logger.info(f"Tool {current_tool_name} execution completed")
-                                
-                                # Extract result from tool message
-                                result_preview = "Tool executed successfully"
-                                if hasattr(node_data, 'get') and 'messages' in node_data:
-                                    messages = node_data['messages']
-                                    if messages and len(messages) > 0:
-                                        tool_message = messages[-1]
-                                        if hasattr(tool_message, 'content'):
-                                            content = str(tool_message.content)
-                                            result_preview = content[:200] + "..." if len(content) > 200 else content
-                                
-                                await self.emit_event("tool_result", {
-                                    "tool_name": current_tool_name,
-                                    "status": "completed",
-                                    "result": result_preview
-                                })
-                                
-                                current_tool_name = None
+                            # Tools node - one update per finished call, matched by tool_call_id
+                            if hasattr(node_data, 'get') and 'messages' in node_data:
+                                for tool_message in node_data['messages']:
+                                    tool_call_id = getattr(tool_message, 'tool_call_id', None)
+                                    tool_name = pending_tools.pop(tool_call_id, None) or getattr(tool_message, 'name', None) or 'unknown_tool'
+                                    logger.info(f"Tool {tool_name} ({tool_call_id}) execution completed")
+                                    
+                                    content = str(tool_message.content)
+                                    result_preview = content[:200] + "..." if len(content) > 200 else content
+                                    
+                                    await self.emit_event("tool_result", {
+                                        "tool_name": tool_name,
+                                        "tool_call_id": tool_call_id,
+                                        "status": "error" if getattr(tool_message, 'status', None) == "error" else "completed",
+                                        "result": result_preview
+                                    })
                         
                         # Keep track of the final state
                         final_response = chunk
@@ -277,7 +482,7 @@ class ORBITWebSocketAgent(ORBITAgent):
                 for node_name, node_data in final_response.items():
                     if node_name == "agent" and hasattr(node_data, 'get') and 'messages' in node_data:
                         logger.info(f"Streaming completed for execution_id: {self.execution_id}")
-                        return node_data
+                        return {**node_data, "messages": streamed_messages}
             
             # Fallback: if streaming didn't capture the response properly, invoke normally
             logger.warning("Streaming didn't capture final response, using fallback invoke")
@@ -296,7 +501,34 @@ class ORBITWebSocketAgent(ORBITAgent):
                 raise Exception(f"Agent processing failed: {str(fallback_error)}")
 
 
-app = FastAPI()
+# Shared agent pool, warmed once per process instead of once per connection
+agent_pool = AgentPool()
+# Conversations outlive connections (and, with the SQLite store, workers and restarts)
+session_store = create_session_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Warming agent pool")
+    try:
+        await agent_pool.warm()
+        logger.info("Agent pool ready")
+    except Exception as e:
+        # Connections retry the warm-up on demand
+        logger.error(f"Agent pool warm-up failed: {str(e)}")
+    agent_pool.start_background_refresh()
+    # New WhatsApp/Gmail messages reach clients as inbox_update events, without an agent turn
+    inbox_watcher = InboxWatcher(manager, agent_pool.tool_cache) if INBOX_WATCHERS else None
+    if inbox_watcher:
+        inbox_watcher.start()
+    yield
+    if inbox_watcher:
+        await inbox_watcher.close()
+    await agent_pool.close()
+    session_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -312,15 +544,80 @@ logger.info("FastAPI app initialized with CORS middleware")
 # Connection manager
 manager = ConnectionManager()
 
+async def _read_client_messages(connection: Connection, agent: ORBITWebSocketAgent, inbound: asyncio.Queue, client_info: str):
+    """Read frames while a turn runs, so cancel requests and disconnects are seen immediately"""
+    while True:
+        frame = await connection.websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000))
+        try:
+            message = connection.codec.decode(frame.get("text") if frame.get("text") is not None else frame.get("bytes"))
+        except ValueError as e:
+            logger.error(f"Invalid JSON received from client {client_info}: {str(e)}")
+            await manager.send_personal_message({
+                "type": "error",
+                "timestamp": datetime.now().isoformat(),
+                "data": {"message": "Invalid JSON format in message"}
+            }, connection.id)
+            continue
+
+        logger.info(f"Received message from {client_info}: {message}")
+        message_type = message.get("type") if isinstance(message, dict) else None
+
+        if message_type == "user_message":
+            try:
+                inbound.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"Inbound queue full for client {client_info}, refusing message")
+                await agent.emit_event("error", {"message": "Too many pending messages, please wait for the current request"})
+        elif message_type == "cancel":
+            # Stop means the queued follow-ups too
+            dropped = 0
+            while not inbound.empty():
+                inbound.get_nowait()
+                dropped += 1
+            if agent.cancel():
+                logger.info(f"Cancel requested by client {client_info} ({dropped} queued messages dropped)")
+            else:
+                await agent.emit_event("agent_cancelled", {"message": "Nothing to cancel", "dropped_messages": dropped})
+        else:
+            logger.warning(f"Received unknown message type '{message_type or 'unknown'}' from {client_info}")
+
+
+async def _process_turns(agent: ORBITWebSocketAgent, inbound: asyncio.Queue, client_info: str):
+    """Run queued user messages one turn at a time"""
+    while True:
+        message = await inbound.get()
+        user_input = message.get("content", "")
+        logger.info(f"Processing user message from {client_info}: '{user_input[:100]}...' ({len(user_input)} chars)")
+        try:
+            reply = await agent.run_turn(user_input)
+        except Exception as e:
+            # chat() already reported the error to the client; keep serving the connection
+            logger.error(f"Failed to process user message from {client_info}: {str(e)}")
+            continue
+        if reply is not None:
+            logger.info(f"Successfully processed user message from {client_info}")
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     client_info = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "unknown"
     logger.info(f"WebSocket connection request from {client_info}")
     
-    await manager.connect(websocket)
+    # Clients may offer "orbit.msgpack" (or "orbit.json") as a subprotocol; JSON otherwise
+    codec = EventCodec.negotiate(websocket.scope.get("subprotocols"))
+    connection = await manager.connect(websocket, codec)
+    
+    # Resume the client's conversation if it reconnects with a known session_id
+    session_id = websocket.query_params.get("session_id")
+    if session_id and not (len(session_id) <= 64 and session_id.isalnum()):
+        logger.warning(f"Ignoring malformed session_id from {client_info}")
+        session_id = None
     
-    # Create agent instance for this connection
-    agent = ORBITWebSocketAgent(manager, websocket)
+    # Create a conversation session on top of the shared agent pool
+    agent = ORBITWebSocketAgent(manager, connection, agent_pool, session_store, session_id)
+    worker = None
     
     try:
         # Initialize agent
@@ -328,43 +625,42 @@ async def websocket_endpoint(websocket: WebSocket):
         await agent.initialize()
         
         logger.info(f"Agent initialized successfully for client {client_info}, entering message loop")
-        while True:
-            # Wait for messages from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-
-            logger.info(f"Received message from {client_info}: {message}")
-            
-            if message["type"] == "user_message":
-                user_input = message["content"]
-                logger.info(f"Processing user message from {client_info}: '{user_input[:100]}...' ({len(user_input)} chars)")
-                response = await agent.chat(user_input)
-                logger.info(f"Successfully processed user message from {client_info}")
-            else:
-                logger.warning(f"Received unknown message type '{message.get('type', 'unknown')}' from {client_info}")
+        # Turns run in their own task; this one keeps reading the socket
+        inbound = asyncio.Queue(maxsize=WS_INBOUND_QUEUE_SIZE)
+        worker = asyncio.create_task(_process_turns(agent, inbound, client_info))
+        await _read_client_messages(connection, agent, inbound, client_info)
                 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for client {client_info}")
-        manager.disconnect(websocket)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON received from client {client_info}: {str(e)}")
-        await manager.send_personal_message({
-            "type": "error",
-            "timestamp": datetime.now().isoformat(),
-            "data": {"message": "Invalid JSON format in message"}
-        }, websocket)
     except Exception as e:
         logger.error(f"Unexpected error in WebSocket endpoint for client {client_info}: {str(e)}")
         try:
+            # Events still waiting in the coalescing window (e.g. initialize()'s error) go first
+            await agent.outbound.flush()
             await manager.send_personal_message({
                 "type": "error",
                 "timestamp": datetime.now().isoformat(),
                 "data": {"message": f"Server error: {str(e)}"}
-            }, websocket)
+            }, connection.id)
         except:
             logger.error(f"Failed to send error message to client {client_info}")
-        finally:
-            manager.disconnect(websocket)
+    finally:
+        if worker is not None:
+            # Abandon the running turn and its tool calls along with the connection
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        try:
+            # Queue what is left in the coalescing window before the connection is forgotten
+            await agent.outbound.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush pending events for client {client_info}: {str(e)}")
+        agent.outbound.close()
+        manager.disconnect(connection.id)
+        # Let the writer flush what is already queued (e.g. the error above) before the socket closes
+        await asyncio.wait({connection.writer}, timeout=WS_SEND_TIMEOUT)
 
 
 @app.get("/health")
@@ -372,7 +668,10 @@ async def health_check():
     health_data = {
         "status": "healthy", 
         "service": "ORBIT WebSocket Server",
-        "active_connections": len(manager.active_connections),
+        "active_connections": len(manager.connections),
+        "lagging_disconnects": manager.lagging_disconnects,
+        "agent_ready": agent_pool.agent is not None,
+        "tool_cache": agent_pool.tool_cache.stats(),
         "timestamp": datetime.now().isoformat()
     }
     logger.debug(f"Health check requested - {health_data}")
@@ -382,14 +681,21 @@ async def health_check():
 if __name__ == "__main__":
     logger.info("="*50)
     logger.info("Starting ORBIT WebSocket Server...")
-    logger.info(f"Server configuration: host=0.0.0.0, port=8080")
+    workers = WS_WORKERS
+    if workers > 1 and not session_store.shared:
+        logger.warning(f"Session store '{SESSION_STORE}' is per-process; running a single worker")
+        workers = 1
+    logger.info(f"Server configuration: host=0.0.0.0, port=9000, workers={workers}, session store={SESSION_STORE}")
     logger.info(f"CORS origins: http://localhost:3000")
     logger.info(f"Logs directory: logs/")
     logger.info(f"Log file: logs/orbit_websocket.log")
     logger.info("="*50)
     
     try:
-        uvicorn.run(app, host="0.0.0.0", port=9000, log_level="info")
+        # Workers need the app as an import string so each process can load it; a single
+        # worker serves this module's app directly instead of importing the module again.
+        # permessage-deflate is uvicorn's default, so large frames are compressed for clients that offer it.
+        uvicorn.run(app if workers == 1 else "websocket_server:app", host="0.0.0.0", port=9000, log_level="info", workers=workers)
     except KeyboardInterrupt:
         logger.info("Server shutdown requested by user")
     except Exception as e: